@@ -7,7 +7,7 @@ from parse_budget import parse_budget
 from excel_management import write_budget
 from transactions import get_transactions, update_auto_categories
 from budget_functions import remove_budget_integers, get_forward_budget
-from get_sums import get_monthly_sums
+from get_sums import get_monthly_sums, get_all_monthly_sums, get_category_monthly_sums, transaction_arrays
 from pandas.errors import ParserError
 from date_utils import parse_dates_list, suggest_date_fix
 import shutil
@@ -33,6 +33,8 @@ def update_budget(budget_xlsx, transactions, this_year):
     # Read the category types
     df_categories = b.parse(sheet_name='Categories').fillna('')
     category_types = df_categories.to_dict('list')
+    # Each category type as a set for the per-category type checks (the Categories sheet keeps the lists)
+    category_type_sets = {k: frozenset(v) for k, v in category_types.items()}
 
     # Read in the yearly planned expenses
     df_expenses = b.parse(sheet_name='Expenses')
@@ -41,8 +43,14 @@ def update_budget(budget_xlsx, transactions, this_year):
     # Get the categories that are represented in the transactions list
     if transactions:
         categories = list(set(transactions['Category'] + b.sheet_names))
+        # Convert the transactions once and sum every category's months in one pass
+        transaction_columns = transaction_arrays(transactions['Date'], transactions['Amount'],
+                                                 transactions['Category'])
+        all_monthly_sums = get_all_monthly_sums(*transaction_columns)
     else:
         categories = b.sheet_names
+        transaction_columns = None
+        all_monthly_sums = None
 
     # Parse the budget
     excluded = ['Projection', 'Monthly', 'Expenses', 'Savings', 'Balances', 'Credit Card', 'Categories',
@@ -83,7 +91,8 @@ def update_budget(budget_xlsx, transactions, this_year):
 
             budget = remove_budget_integers(budget)
             budgets[category], projections[category], forecasts[category] = \
-                parse_budget(category, budget, transactions, expenses, category_types, this_year)
+                parse_budget(category, budget, transactions, expenses, category_type_sets, this_year,
+                             transaction_columns, all_monthly_sums)
 
             # Create the projection sheet
             for i in range(0, 6):
@@ -94,11 +103,11 @@ def update_budget(budget_xlsx, transactions, this_year):
         else:
             budget = {'Date': [], 'Desc.': [], 'This Year': [], 'R': [], 'Next Year': [], 'Note': []}
             budgets[category], projections[category], forecasts[category] = \
-                parse_budget(category, budget, transactions, expenses, category_types, this_year)
+                parse_budget(category, budget, transactions, expenses, category_type_sets, this_year,
+                             transaction_columns, all_monthly_sums)
             # Determine category monthly totals for all transactions
             missing_budgets.append(category)
-            category_monthly_sums = get_monthly_sums(category, transactions['Date'],
-                                                     transactions['Amount'], transactions['Category'])
+            category_monthly_sums = get_category_monthly_sums(all_monthly_sums, category)
             category_monthly_sums = [x for x in category_monthly_sums if abs(x[1]) > 0.0]
             monthly_transactions = [[x[0], f'{category} transactions for {x[0].strftime("%B")} {x[0].year}',
                                      x[1], category, 0.0, ''] for i, x in enumerate(category_monthly_sums)]
@@ -117,15 +126,15 @@ def update_budget(budget_xlsx, transactions, this_year):
     for category in categories:
         if category in excluded:
             continue
-        if category in category_types['Loan']:
+        if category in category_type_sets['Loan']:
             differences[category] = sum([x for x in budgets[category]['Difference'] if isinstance(x, float)])
-        elif category in category_types['Yearly']:
+        elif category in category_type_sets['Yearly']:
             differences[category] = sum([x for x in budgets[category]['Difference'] if isinstance(x, float)])
             yearly_summary['Category'].append(category)
             yearly_summary['Planned'].append(sum([x for x in budgets[category].get('This Year', []) if isinstance(x, (int, float))]))
             yearly_summary['Spent'].append(sum([x for x in budgets[category].get('Actual', []) if isinstance(x, (int, float))]))
             yearly_summary['Remaining'].append(sum([x for x in budgets[category].get('Remaining', []) if isinstance(x, (int, float))]))
-        elif category in category_types['Quarterly']:
+        elif category in category_type_sets['Quarterly']:
             for i in range(4):
                 q_summary_data[i+1].append({
                     'Category': category,
@@ -133,7 +142,7 @@ def update_budget(budget_xlsx, transactions, this_year):
                     'Spent': budgets[category]['Spent'][i],
                     'Remaining': budgets[category]['Remaining'][i]
                 })
-        elif category in category_types['Monthly']:
+        elif category in category_type_sets['Monthly']:
             for i in range(4):
                 q_months = quarterly_months[i]
                 
@@ -181,7 +190,7 @@ def update_budget(budget_xlsx, transactions, this_year):
     ideal_dict, ideal_monthly_sums_dict = make_projection_dict(ideal_budget, 0.0, this_year + 1)
 
     # Calculate remaining expenses for the year
-    remaining_expenses = calculate_remaining_expenses_from_sheets(budget_xlsx, category_types, this_year)
+    remaining_expenses = calculate_remaining_expenses_from_sheets(budget_xlsx, category_type_sets, this_year)
 
     # Write out the updated budget
     b.close()
@@ -386,8 +386,8 @@ def compare_transactions(current_df, previous_df):
     }
     
     # Calculate category changes
-    current_categories = current_df.groupby('Category')['Amount'].sum().to_dict()
-    previous_categories = previous_df.groupby('Category')['Amount'].sum().to_dict()
+    current_categories = current_df.groupby('Category', observed=True)['Amount'].sum().to_dict()
+    previous_categories = previous_df.groupby('Category', observed=True)['Amount'].sum().to_dict()
     
     # Find categories that changed or are new/removed
     all_categories = set(current_categories.keys()) | set(previous_categories.keys())
@@ -510,7 +510,7 @@ def plot_transaction_comparison(comparison_data, top_n=10, save=True):
     # 3. Plot new transactions by category
     new_transactions = comparison_data['new_transactions']
     if not new_transactions.empty:
-        new_by_category = new_transactions.groupby('Category')['Amount'].sum()
+        new_by_category = new_transactions.groupby('Category', observed=True)['Amount'].sum()
         new_by_category = new_by_category.sort_values()
         
         plt.figure(figsize=(14, 8))
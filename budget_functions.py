@@ -1,6 +1,6 @@
 import datetime
 from datetime import date
-from get_sums import get_monthly_sums, get_quarterly_sums
+from get_sums import get_monthly_sums, get_quarterly_sums, transaction_arrays
 from utilities import end_of_month, remove_list_blanks, make_dict_list_same_len, range_eom_dates
 
 
@@ -130,13 +130,16 @@ def parse_loan_budget(category, category_budget, actual_monthly_sums, this_year)
     return category_budget, year_projection, []
 
 
-def parse_quarterly_budget(category, category_budget, transactions, this_year):
+def parse_quarterly_budget(category, category_budget, transactions, this_year, transaction_columns=None):
     """Parses a quarterly type budget"""
 
     # Get the category's quarterly sums
     if transactions:
+        if transaction_columns is None:
+            transaction_columns = transaction_arrays(transactions['Date'], transactions['Amount'],
+                                                     transactions['Category'])
         quarterly_spent, quarterly_remaining = get_quarterly_sums(
-            category, transactions['Date'], transactions['Amount'], transactions['Category'], category_budget['This Year'])
+            category, *transaction_columns, category_budget['This Year'])
     else:
         quarterly_spent, quarterly_remaining = get_quarterly_sums(
             category, [], [], [], category_budget['This Year'])
@@ -1,65 +1,92 @@
 import argparse
 import pandas as pd
-from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+from utilities import EXCEL_READ_ENGINE
 
+# Diff_ columns only hold small numeric deltas (or 0/1 flags), so they get a fixed width
+DIFF_COLUMN_WIDTH = 12
 
-def apply_accounting_format(worksheet):
-    """Apply accounting format to all cells in a worksheet, except the header and index."""
+
+def apply_accounting_format(worksheet, df):
+    """Apply accounting format to the numeric columns of a worksheet, except the header and index."""
     accounting_format = '"$"#,##0.00_);[Red]("$"#,##0.00)'
-    for row in worksheet.iter_rows(min_row=2, min_col=2):  # Skip header and index
-        for cell in row:
+    for c_idx, (col, dtype) in enumerate(df.dtypes.items(), 2):  # Column A holds the index
+        if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            continue
+        for (cell,) in worksheet.iter_rows(min_row=2, min_col=c_idx, max_col=c_idx):  # Skip header
             cell.number_format = accounting_format
 
 
-def autosize_columns_from_dataframe(df, worksheet):
-    """Auto-size columns in an openpyxl worksheet based on dataframe contents."""
-    for col in worksheet.columns:
-        max_length = max((len(str(cell.value)) for cell in col if cell.value), default=0)
-        col_letter = col[0].column_letter
-        worksheet.column_dimensions[col_letter].width = max_length + 2
+def compute_column_widths(df):
+    """Get the longest string length of each dataframe column, header included."""
+    widths = {}
+    for col in df.columns:
+        values = df[col].dropna().astype(str)
+        max_length = values.str.len().max() if not values.empty else 0
+        widths[col] = max(int(max_length), len(str(col)))
+    return widths
+
+
+def apply_widths(worksheet, df, widths):
+    """Set the column widths of a worksheet written by dataframe_to_excel_sheet."""
+    index_length = max([len(str(x)) for x in df.index] + [len(str(df.index.name or ''))])
+    worksheet.column_dimensions['A'].width = index_length + 2
+    for c_idx, col in enumerate(df.columns, 2):
+        width = widths.get(col, len(str(col)))
+        worksheet.column_dimensions[get_column_letter(c_idx)].width = width + 2
 
 
 def format_worksheet(worksheet):
     """Apply formatting to the worksheet."""
-    # Center-align all cells
+    # Center-align all cells (sharing one Alignment rather than building one per cell)
+    centered = Alignment(horizontal="center")
     for row in worksheet.iter_rows():
         for cell in row:
-            cell.alignment = Alignment(horizontal="center")
+            cell.alignment = centered
 
     # Bold the header (month) row and the "Categories" column
+    bold = Font(bold=True)
     for cell in worksheet["A"] + worksheet[1]:
-        cell.font = Font(bold=True)
+        cell.font = bold
 
 
 def dataframe_to_excel_sheet(df, workbook, sheet_name):
     """Write a dataframe to an Excel sheet and return the worksheet."""
     ws = workbook.create_sheet(title=sheet_name)
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=True, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            ws.cell(row=r_idx, column=c_idx, value=value)
+    ws.append([df.index.name or ''] + list(df.columns))
+    for row in df.itertuples(index=True, name=None):
+        ws.append(row)
     return ws
 
 
+def numeric_column_pair(combined, columns):
+    """Get the numeric _File1 and _File2 values of the columns, both labelled with their Diff_ names."""
+    diff_columns = [f'Diff_{col}' for col in columns]
+    values1 = combined[[f'{col}_File1' for col in columns]].apply(pd.to_numeric, errors='coerce')
+    values2 = combined[[f'{col}_File2' for col in columns]].apply(pd.to_numeric, errors='coerce')
+    return values1.set_axis(diff_columns, axis=1), values2.set_axis(diff_columns, axis=1)
+
+
 def enhanced_compute_differences(file1, file2, sheet_name="Monthly"):
     # Check if the sheet has a 'Categories' column to determine how to read it
     try:
         # Read a sample to check columns
-        sample_df = pd.read_excel(file1, sheet_name=sheet_name, nrows=1, engine='openpyxl')
+        sample_df = pd.read_excel(file1, sheet_name=sheet_name, nrows=1, engine=EXCEL_READ_ENGINE)
         has_categories = 'Categories' in sample_df.columns
     except Exception:
         has_categories = False
     
     if has_categories:
         # Read the sheets with 'Categories' as the index
-        monthly1 = pd.read_excel(file1, sheet_name=sheet_name, index_col='Categories', engine='openpyxl')
-        monthly2 = pd.read_excel(file2, sheet_name=sheet_name, index_col='Categories', engine='openpyxl')
+        monthly1 = pd.read_excel(file1, sheet_name=sheet_name, index_col='Categories', engine=EXCEL_READ_ENGINE)
+        monthly2 = pd.read_excel(file2, sheet_name=sheet_name, index_col='Categories', engine=EXCEL_READ_ENGINE)
         use_positional = False
     else:
         # Read the sheets without setting an index (for sheets like Q Summary)
-        monthly1 = pd.read_excel(file1, sheet_name=sheet_name, engine='openpyxl')
-        monthly2 = pd.read_excel(file2, sheet_name=sheet_name, engine='openpyxl')
+        monthly1 = pd.read_excel(file1, sheet_name=sheet_name, engine=EXCEL_READ_ENGINE)
+        monthly2 = pd.read_excel(file2, sheet_name=sheet_name, engine=EXCEL_READ_ENGINE)
         
         # For certain sheets, force positional comparison even if first column is unique
         force_positional_sheets = ['Q Summary', 'Balances', 'Expenses']
@@ -102,19 +129,10 @@ def enhanced_compute_differences(file1, file2, sheet_name="Monthly"):
         # Create the combined dataframe
         combined = pd.DataFrame(combined_data)
         
-        # Calculate differences for each column
-        for col in monthly1.columns:
-            if col in monthly2.columns:
-                file1_col = f'{col}_File1'
-                file2_col = f'{col}_File2'
-                try:
-                    # Try numeric difference
-                    val1 = pd.to_numeric(combined[file1_col], errors='coerce').fillna(0)
-                    val2 = pd.to_numeric(combined[file2_col], errors='coerce').fillna(0)
-                    combined[f'Diff_{col}'] = val1 - val2
-                except:
-                    # String comparison
-                    combined[f'Diff_{col}'] = (combined[file1_col].astype(str) != combined[file2_col].astype(str)).astype(int)
+        # Calculate differences for every shared column at once (non-numeric values count as 0)
+        shared = [col for col in monthly1.columns if col in monthly2.columns]
+        values1, values2 = numeric_column_pair(combined, shared)
+        combined = pd.concat([combined, values1.fillna(0) - values2.fillna(0)], axis=1)
         
         # Add row numbers as index
         combined.index = range(len(combined))
@@ -124,15 +142,11 @@ def enhanced_compute_differences(file1, file2, sheet_name="Monthly"):
         # Original join-based comparison for indexed data
         combined = monthly1.join(monthly2, how='outer', lsuffix='_File1', rsuffix='_File2').fillna(0)
 
-        # Calculate differences for each column
-        for col in monthly1.columns:
-            if f'{col}_File1' in combined.columns and f'{col}_File2' in combined.columns:
-                try:
-                    # Try numeric difference first
-                    combined[f'Diff_{col}'] = pd.to_numeric(combined[f'{col}_File1'], errors='coerce') - pd.to_numeric(combined[f'{col}_File2'], errors='coerce')
-                except:
-                    # If numeric conversion fails, just mark as different if values don't match
-                    combined[f'Diff_{col}'] = (combined[f'{col}_File1'] != combined[f'{col}_File2']).astype(int)
+        # Calculate differences for every shared column at once (non-numeric values give blank differences)
+        shared = [col for col in monthly1.columns
+                  if f'{col}_File1' in combined.columns and f'{col}_File2' in combined.columns]
+        values1, values2 = numeric_column_pair(combined, shared)
+        combined = pd.concat([combined, values1 - values2], axis=1)
 
     # Create a new workbook
     wb = Workbook()
@@ -143,11 +157,25 @@ def enhanced_compute_differences(file1, file2, sheet_name="Monthly"):
     ws2 = dataframe_to_excel_sheet(monthly2, wb, "File2_" + sheet_name.replace(' ', '_'))
     ws_diff = dataframe_to_excel_sheet(combined, wb, "Diffs")
 
+    # Compute the column widths once per file and reuse them for the matching Diffs columns
+    widths1 = compute_column_widths(monthly1)
+    widths2 = compute_column_widths(monthly2)
+    diff_widths = {}
+    for col in combined.columns:
+        if col.endswith('_File1') and col[:-len('_File1')] in widths1:
+            diff_widths[col] = max(widths1[col[:-len('_File1')]], len(col))
+        elif col.endswith('_File2') and col[:-len('_File2')] in widths2:
+            diff_widths[col] = max(widths2[col[:-len('_File2')]], len(col))
+        elif col.startswith('Diff_'):
+            diff_widths[col] = max(DIFF_COLUMN_WIDTH, len(col))
+        else:
+            diff_widths[col] = widths1.get(col, widths2.get(col, len(str(col))))
+
     # Apply formatting and accounting format
-    for ws, df in [(ws1, monthly1), (ws2, monthly2), (ws_diff, combined)]:
+    for ws, df, widths in [(ws1, monthly1, widths1), (ws2, monthly2, widths2), (ws_diff, combined, diff_widths)]:
         format_worksheet(ws)
-        apply_accounting_format(ws)
-        autosize_columns_from_dataframe(df, ws)
+        apply_accounting_format(ws, df)
+        apply_widths(ws, df, widths)
 
     # Save the workbook
     output_file = sheet_name.replace(' ', '_') + '_diffs.xlsx'
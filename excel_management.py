@@ -3,9 +3,15 @@ import datetime
 from utilities import make_dict_list_same_len, dates_to_str, remove_list_blanks_nonzero
 import os
 import shutil
-from xlsxwriter.utility import xl_col_to_name
+import weakref
+from bisect import bisect_left
+from itertools import accumulate
+from xlsxwriter.utility import xl_cell_to_rowcol
 from config import get_archive_dir, get_transactions_path
 
+# Rows converted at once when streaming a DataFrame into a worksheet
+ROW_BLOCK_SIZE = 10000
+
 
 def write_transactions_xlsx(transactions_input, new_transactions):
     """Function to write transactions into an xlsx"""
@@ -13,43 +19,97 @@ def write_transactions_xlsx(transactions_input, new_transactions):
     archive_dir = get_archive_dir()  # Creates dir if needed
     transactions_path = get_transactions_path()
     
+    now = datetime.datetime.today()
     back_up_xls = 'transactions' \
-                  + f'_{datetime.date.today().month}_{datetime.date.today().day}_{datetime.date.today().year}_' \
-                    f'{datetime.datetime.today().second}.xlsx'
+                  + f'_{now.month}_{now.day}_{now.year}_{now.second}_{now.microsecond:06d}.xlsx'
     # Only back up if an existing transactions file is present
     if transactions_path.exists():
         shutil.copy(transactions_path, archive_dir / back_up_xls)
 
-    # Create transactions dataframe and output into the Transactions sheet
-    dates_to_str(transactions_input)
+    # Create transactions dataframe and output into the Transactions sheet.
+    # Dates stay real datetimes so they are written as Excel dates (and sort chronologically)
     df = pd.DataFrame.from_dict(transactions_input)
-    dates_to_str(new_transactions)
     df_new_transactions = pd.DataFrame.from_dict(new_transactions)
-    df.sort_values('Date', inplace=True)
-    df_new_transactions.sort_values('Date', inplace=True)
-    writer = pd.ExcelWriter(transactions_path, engine='xlsxwriter')
-    df.to_excel(writer, sheet_name='Transactions', index=False, na_rep='')
-    df_new_transactions.to_excel(writer, sheet_name='Imported', index=False, na_rep='')
-
-    # Format the xls
+    for this_df in (df, df_new_transactions):
+        this_df['Date'] = pd.to_datetime(this_df['Date'], errors='coerce')
+    df = df.sort_values('Date', kind='stable', ignore_index=True)
+    df_new_transactions = df_new_transactions.sort_values('Date', kind='stable', ignore_index=True)
+    # constant_memory flushes each row to disk once the next row is started, so the sheets are written
+    # row by row below rather than through to_excel (which writes column by column)
+    writer = pd.ExcelWriter(transactions_path, engine='xlsxwriter',
+                            engine_kwargs={'options': {'constant_memory': True,
+                                                       'default_date_format': 'mm/dd/yyyy'}})
+
+    # Format and write the xls
     dfs = [df, df_new_transactions]
     sheet_names = ['Transactions', 'Imported']
     for i, this_df in enumerate(dfs):
+        worksheet = writer.book.add_worksheet(sheet_names[i])
+        writer.sheets[sheet_names[i]] = worksheet
         make_xls_pretty(writer, this_df, sheet_names[i])
+        write_dataframe_rows(worksheet, this_df, _get_formats(writer.book)['header'])
 
     writer.close()
 
 
+def write_dataframe_rows(worksheet, df, header_format):
+    """Write a DataFrame's header and rows to a worksheet in strict row order, with blanks for missing values"""
+    worksheet.write_row(0, 0, [str(x) for x in df.columns], header_format)
+    # Convert to Python objects a block of rows at a time so peak memory stays bounded for large sheets
+    for start in range(0, df.shape[0], ROW_BLOCK_SIZE):
+        block = df.iloc[start:start + ROW_BLOCK_SIZE]
+        values = block.astype(object).where(block.notna(), None)
+        for row_num, row_data in enumerate(values.itertuples(index=False, name=None), start + 1):
+            worksheet.write_row(row_num, 0, row_data)
+
+
+def write_dataframe_sheet(writer, df, sheet_name):
+    """Write a DataFrame to a new sheet with xlsxwriter's row writer, bypassing pandas' per-cell to_excel"""
+    worksheet = writer.book.add_worksheet(sheet_name)
+    writer.sheets[sheet_name] = worksheet
+    write_dataframe_rows(worksheet, df, _get_formats(writer.book)['header'])
+    return worksheet
+
+
+# The cell formats shared by every sheet of each open workbook, dropped once the workbook is gone
+_workbook_formats = weakref.WeakKeyDictionary()
+
+
+def _get_formats(workbook):
+    """Get the cell formats shared by every sheet of a workbook, creating them on first use"""
+    if workbook not in _workbook_formats:
+        _workbook_formats[workbook] = {
+            'num': workbook.add_format({'num_format': '#,###.00'}),
+            'date': workbook.add_format({'num_format': 'mm/dd/yyyy'}),
+            'int': workbook.add_format({'num_format': '#,###'}),
+            'header': workbook.add_format({'bold': True, 'bottom': 1}),
+            'centered_header': workbook.add_format({'bold': True, 'bottom': 1, 'align': 'center'}),
+            'title': workbook.add_format({'bold': True, 'font_size': 14, 'align': 'center'}),
+            'url': workbook.add_format({'color': 'blue', 'underline': 1}),
+        }
+    return _workbook_formats[workbook]
+
+
+def _max_str_len(series):
+    """Get the length of the longest value of a Series as a string, using pandas' vectorized string lengths"""
+    if series.empty:
+        return 0
+    return int(series.astype(str).str.len().max())
+
+
+def column_widths(df):
+    """Get the display width of each column of df: its longest value or header"""
+    return [max(_max_str_len(df[column]), len(column)) for column in df]
+
+
 def make_xls_pretty(writer, df, sheet_name, **kwargs):
     """Function to make the sheets readable"""
 
-    # Get the xlsxwriter workbook and worksheet objects
-    workbook = writer.book
-
-    # Set a currency number format for an amount column
-    num_format = workbook.add_format({'num_format': '#,###.00'})
-    date_format = workbook.add_format({'num_format': 'mm/dd/yyyy'})
-    int_format = workbook.add_format({'num_format': '#,###'})
+    # Get the shared number formats for the workbook
+    formats = _get_formats(writer.book)
+    num_format = formats['num']
+    date_format = formats['date']
+    int_format = formats['int']
 
     # For each column in each sheet set the appropriate column width
     date_columns = ['Date', 'End of Month']
@@ -60,321 +120,217 @@ def make_xls_pretty(writer, df, sheet_name, **kwargs):
                  'Int': [int_columns, int_format]}
 
     if 'all' in kwargs.keys():
-        for column in df:
-            col_idx = df.columns.get_loc(column)
+        for col_idx, column in enumerate(df.columns):
             if column == 'Categories':
-                column_length = max(df[column].astype(str).map(len).max(), len(column))
+                column_length = max(_max_str_len(df[column]), len(column))
             else:
                 column_length = 17
             writer.sheets[sheet_name].set_column(col_idx, col_idx, column_length, num_format)
         return
 
-    for column in df:
-        column_length = max(df[column].astype(str).map(len).max(), len(column)) + 5
-        col_idx = df.columns.get_loc(column)
+    for col_idx, (column, width) in enumerate(zip(df.columns, column_widths(df))):
+        column_length = width + 5
         for key, key_list in date_dict.items():
             these_columns = key_list[0]
             this_format = key_list[1]
             if column in these_columns:
                 writer.sheets[sheet_name].set_column(col_idx, col_idx, column_length, this_format)
                 break
-        writer.sheets[sheet_name].set_column(col_idx, col_idx, column_length)
+        else:
+            writer.sheets[sheet_name].set_column(col_idx, col_idx, column_length)
 
 
-def write_summary_sheet_with_links(writer, df, sheet_name, nav_links=None, nav_col=None):
-    """Writes a summary DataFrame to a sheet with hyperlinks for the Category column."""
-    workbook = writer.book
-    worksheet = workbook.add_worksheet(sheet_name)
-    writer.sheets[sheet_name] = worksheet
+def write_cell(worksheet, row_num, col_num, cell_data, num_format=None, date_format=None):
+    """Write a single data cell, picking the xlsxwriter write method from the value's type"""
+    if date_format is not None and isinstance(cell_data, datetime.date):
+        worksheet.write_datetime(row_num, col_num, cell_data, date_format)
+    elif isinstance(cell_data, (int, float)):
+        # NaN is the only number not equal to itself
+        if cell_data != cell_data:
+            worksheet.write_blank(row_num, col_num, None)
+        else:
+            worksheet.write_number(row_num, col_num, cell_data, num_format)
+    else:
+        worksheet.write(row_num, col_num, cell_data)
 
-    # Add formats
-    header_format = workbook.add_format({'bold': True, 'bottom': 1})
-    num_format = workbook.add_format({'num_format': '#,###.00'})
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
 
-    # Write header
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
+def write_data_columns(worksheet, df, start_row, num_format=None, date_format=None, skip_columns=()):
+    """Write a DataFrame's data one column at a time, starting at start_row.
 
-    # Write data rows
-    cat_col_idx = df.columns.get_loc('Category')
-    for row_num, row_data in enumerate(df.itertuples(index=False), 1):
-        for col_num, cell_data in enumerate(row_data):
-            if col_num == cat_col_idx:
-                url = f"internal:'{cell_data}'!A1"
-                worksheet.write_url(row_num, col_num, url, cell_format=url_format, string=cell_data)
-            else:
-                if isinstance(cell_data, (int, float)):
-                    if pd.isna(cell_data):
-                        worksheet.write_blank(row_num, col_num, None)
-                    else:
-                        worksheet.write_number(row_num, col_num, cell_data, num_format)
-                else:
-                    worksheet.write(row_num, col_num, cell_data)
+    Numeric columns go out in a single write_column call, the others cell by cell through write_cell.
+    Columns in skip_columns are left for the caller to write (e.g. hyperlink columns).
+    """
+    for col_num, column in enumerate(df.columns):
+        if column in skip_columns:
+            continue
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            worksheet.write_column(start_row, col_num, values.astype(object).where(values.notna(), None).tolist(),
+                                   num_format)
+        else:
+            for row_num, cell_data in enumerate(values.tolist(), start_row):
+                write_cell(worksheet, row_num, col_num, cell_data, num_format, date_format)
 
-    # Add navigation links if provided
-    if nav_links and nav_col:
-        for i, link_sheet in enumerate(nav_links, start=1):
-            cell = f'{nav_col}{i}'
-            url = f"internal:'{link_sheet}'!A1"
-            worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
 
-    # Auto-adjust column widths
-    for i, col in enumerate(df.columns):
-        column_len = len(col)
-        max_len = df[col].astype(str).map(len).max()
-        if pd.notna(max_len):
-            column_len = max(column_len, max_len)
-        worksheet.set_column(i, i, column_len + 2)
-    
-    # Add a bar chart if 'Planned' and 'Spent' columns exist
-    if 'Planned' in df.columns and 'Spent' in df.columns and not df.empty:
-        chart = workbook.add_chart({'type': 'column'})
-        num_rows = len(df)
-        
-        # Get column indexes
-        cat_col_idx = df.columns.get_loc('Category')
-        plan_col_idx = df.columns.get_loc('Planned')
-        spent_col_idx = df.columns.get_loc('Spent')
-
-        # Define data series references
-        categories_ref = f"='{sheet_name}'!${xl_col_to_name(cat_col_idx)}$2:${xl_col_to_name(cat_col_idx)}${num_rows + 1}"
-        planned_ref = f"='{sheet_name}'!${xl_col_to_name(plan_col_idx)}$2:${xl_col_to_name(plan_col_idx)}${num_rows + 1}"
-        spent_ref = f"='{sheet_name}'!${xl_col_to_name(spent_col_idx)}$2:${xl_col_to_name(spent_col_idx)}${num_rows + 1}"
-        
-        # Add series to the chart
-        chart.add_series({
-            'name': 'Planned',
-            'categories': categories_ref,
-            'values':     planned_ref,
-            'fill':       {'color': 'green'},
-        })
-        chart.add_series({
-            'name':       'Spent',
-            'values':     spent_ref,
-            'fill':       {'color': 'red'},
-        })
-        
-        # Configure chart
-        chart.set_title({'name': f'{sheet_name} Planned vs. Spent'})
-        chart.set_x_axis({'name': 'Category', 'text_axis': True, 'num_font': {'rotation': 45}})
-        chart.set_y_axis({'name': 'Amount ($)'})
-        chart.set_size({'width': 720, 'height': 576})
-        
-        # Insert chart into the worksheet
-        chart_col = 'H'
-        if nav_col:
-            chart_col_idx = ord(nav_col[0]) - ord('A') + 2
-            chart_col = xl_col_to_name(chart_col_idx)
-        worksheet.insert_chart(f'{chart_col}2', chart)
+def write_nav_panel(worksheet, nav_links, nav_col, url_format):
+    """Write the navigation links to the other sheets down a column, starting at the top row"""
+    if not nav_links or not nav_col:
+        return
+    col_idx = xl_cell_to_rowcol(f'{nav_col}1')[1]
+    for row_num, link_sheet in enumerate(nav_links):
+        url = f"internal:'{link_sheet}'!A1"
+        worksheet.write_url(row_num, col_idx, url, cell_format=url_format, string=link_sheet)
 
 
-def write_sheet_with_all_category_links(writer, df, sheet_name, category_sheets, nav_links=None, nav_col=None):
-    """Writes a DataFrame to a sheet, turning any cell that is a category name into a hyperlink."""
-    workbook = writer.book
-    worksheet = workbook.add_worksheet(sheet_name)
-    writer.sheets[sheet_name] = worksheet
+def write_linked_table(writer, worksheet, df, start_row, header_format, links=None):
+    """Write a DataFrame's header and data at start_row, turning linked cells into hyperlinks to other sheets.
 
-    # Add formats
-    header_format = workbook.add_format({'bold': True, 'bottom': 1})
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
+    links maps a column name to a function that returns the sheet a cell value should link to, or None to
+    write the value as a plain cell.
+    """
+    formats = _get_formats(writer.book)
+    num_format = formats['num']
+    date_format = formats['date']
+    url_format = formats['url']
+    links = links or {}
 
     # Write header
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
-
-    # Write data rows
-    for row_num, row_data in enumerate(df.itertuples(index=False), 1):
-        for col_num, cell_data in enumerate(row_data):
-            if isinstance(cell_data, str) and cell_data in category_sheets:
-                url = f"internal:'{cell_data}'!A1"
-                worksheet.write_url(row_num, col_num, url, cell_format=url_format, string=cell_data)
+    worksheet.write_row(start_row, 0, df.columns.tolist(), header_format)
+
+    # Write data columns, then the hyperlink columns
+    write_data_columns(worksheet, df, start_row + 1, num_format=num_format, date_format=date_format,
+                       skip_columns=links)
+    for col_num, column in enumerate(df.columns):
+        if column not in links:
+            continue
+        link_sheet = links[column]
+        for row_num, cell_data in enumerate(df[column].tolist(), start_row + 1):
+            target = link_sheet(cell_data)
+            if target is None:
+                write_cell(worksheet, row_num, col_num, cell_data, num_format, date_format)
             else:
-                if isinstance(cell_data, (int, float)):
-                    if pd.isna(cell_data):
-                        worksheet.write_blank(row_num, col_num, None)
-                    else:
-                        worksheet.write_number(row_num, col_num, cell_data)
-                else:
-                    worksheet.write(row_num, col_num, cell_data)
+                url = f"internal:'{target}'!A1"
+                worksheet.write_url(row_num, col_num, url, cell_format=url_format, string=cell_data)
+
+
+def write_linked_sheet(writer, df, sheet_name, links=None, nav_links=None, nav_col=None):
+    """Write a DataFrame to a new sheet with hyperlinked cells, a navigation panel and fitted column widths"""
+    worksheet = writer.book.add_worksheet(sheet_name)
+    writer.sheets[sheet_name] = worksheet
+    formats = _get_formats(writer.book)
+
+    write_linked_table(writer, worksheet, df, 0, formats['header'], links)
 
     # Add navigation links if provided
-    if nav_links and nav_col:
-        for i, link_sheet in enumerate(nav_links, start=1):
-            cell = f'{nav_col}{i}'
-            url = f"internal:'{link_sheet}'!A1"
-            worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
+    write_nav_panel(worksheet, nav_links, nav_col, formats['url'])
 
     # Auto-adjust column widths
-    for i, col in enumerate(df.columns):
-        column_len = len(col)
-        max_len = df[col].astype(str).map(len).max()
-        if pd.notna(max_len):
-            column_len = max(column_len, max_len)
-        worksheet.set_column(i, i, column_len + 2)
+    for i, width in enumerate(column_widths(df)):
+        worksheet.set_column(i, i, width + 2)
+    return worksheet
 
 
-def write_sheet_with_nav_panel(writer, df, sheet_name, nav_links, nav_col):
-    """Writes a DataFrame to a sheet and adds a navigation panel."""
-    workbook = writer.book
-    worksheet = workbook.add_worksheet(sheet_name)
-    writer.sheets[sheet_name] = worksheet
+def add_planned_vs_spent_chart(workbook, worksheet, df, sheet_name, start_row, title, anchor_row, anchor_col):
+    """Chart a table's Planned and Spent columns by Category, if it has both, for a table whose header is at start_row"""
+    if 'Planned' not in df.columns or 'Spent' not in df.columns or df.empty:
+        return
+    chart = workbook.add_chart({'type': 'column'})
 
-    # Add formats
-    header_format = workbook.add_format({'bold': True, 'bottom': 1})
-    num_format = workbook.add_format({'num_format': '#,###.00'})
-    date_format = workbook.add_format({'num_format': 'mm/dd/yyyy'})
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
+    # Define data series references as [sheet, first_row, first_col, last_row, last_col] lists
+    first_row = start_row + 1
+    last_row = start_row + len(df)
+    cat_col_idx = df.columns.get_loc('Category')
+    plan_col_idx = df.columns.get_loc('Planned')
+    spent_col_idx = df.columns.get_loc('Spent')
 
-    # Write header
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
-
-    # Write data rows
-    for row_num, row_data in enumerate(df.itertuples(index=False), 1):
-        for col_num, cell_data in enumerate(row_data):
-            if isinstance(cell_data, datetime.date):
-                worksheet.write_datetime(row_num, col_num, cell_data, date_format)
-            elif isinstance(cell_data, (int, float)):
-                if pd.isna(cell_data):
-                    worksheet.write_blank(row_num, col_num, None)
-                else:
-                    worksheet.write_number(row_num, col_num, cell_data, num_format)
-            else:
-                worksheet.write(row_num, col_num, cell_data)
+    # Add series to the chart
+    chart.add_series({
+        'name': 'Planned',
+        'categories': [sheet_name, first_row, cat_col_idx, last_row, cat_col_idx],
+        'values':     [sheet_name, first_row, plan_col_idx, last_row, plan_col_idx],
+        'fill':       {'color': 'green'},
+    })
+    chart.add_series({
+        'name':       'Spent',
+        'values':     [sheet_name, first_row, spent_col_idx, last_row, spent_col_idx],
+        'fill':       {'color': 'red'},
+    })
 
-    # Add navigation links
-    if nav_links and nav_col:
-        for i, link_sheet in enumerate(nav_links, start=1):
-            cell = f'{nav_col}{i}'
-            url = f"internal:'{link_sheet}'!A1"
-            worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
+    # Configure chart
+    chart.set_title({'name': title})
+    chart.set_x_axis({'name': 'Category', 'text_axis': True, 'num_font': {'rotation': 45}})
+    chart.set_y_axis({'name': 'Amount ($)'})
+    chart.set_size({'width': 720, 'height': 576})
 
-    # Auto-adjust column widths
-    for i, col in enumerate(df.columns):
-        column_len = len(col)
-        max_len = df[col].astype(str).map(len).max()
-        if pd.notna(max_len):
-            column_len = max(column_len, max_len)
-        worksheet.set_column(i, i, column_len + 2)
+    # Insert chart into the worksheet
+    worksheet.insert_chart(anchor_row, anchor_col, chart)
+
+
+def _link_to_self(cell_data):
+    return cell_data
+
+
+def write_summary_sheet_with_links(writer, df, sheet_name, nav_links=None, nav_col=None):
+    """Writes a summary DataFrame to a sheet with hyperlinks for the Category column."""
+    worksheet = write_linked_sheet(writer, df, sheet_name, links={'Category': _link_to_self},
+                                   nav_links=nav_links, nav_col=nav_col)
+
+    # Add a bar chart beside the nav panel if 'Planned' and 'Spent' columns exist
+    chart_col_idx = ord(nav_col[0]) - ord('A') + 2 if nav_col else 7
+    add_planned_vs_spent_chart(writer.book, worksheet, df, sheet_name, 0, f'{sheet_name} Planned vs. Spent',
+                               1, chart_col_idx)
+
+
+def write_sheet_with_all_category_links(writer, df, sheet_name, category_sheets, nav_links=None, nav_col=None):
+    """Writes a DataFrame to a sheet, turning any cell that is a category name into a hyperlink."""
+    category_sheets_set = frozenset(category_sheets)
+
+    def link_category(cell_data):
+        return cell_data if isinstance(cell_data, str) and cell_data in category_sheets_set else None
+
+    # Only the text (non-numeric) columns can hold category names
+    links = {x: link_category for x in df.columns
+             if not pd.api.types.is_numeric_dtype(df[x]) or pd.api.types.is_bool_dtype(df[x])}
+    write_linked_sheet(writer, df, sheet_name, links=links, nav_links=nav_links, nav_col=nav_col)
+
+
+def write_sheet_with_nav_panel(writer, df, sheet_name, nav_links, nav_col):
+    """Writes a DataFrame to a sheet and adds a navigation panel."""
+    write_linked_sheet(writer, df, sheet_name, nav_links=nav_links, nav_col=nav_col)
 
 
 def write_quarterly_summary_sheet(writer, df, sheet_name, start_row, q_num):
     """Writes a quarterly summary DataFrame and its chart to a sheet."""
     workbook = writer.book
     worksheet = writer.sheets[sheet_name]
+    formats = _get_formats(workbook)
 
-    # Add formats
-    header_format = workbook.add_format({'bold': True, 'bottom': 1, 'align': 'center'})
-    num_format = workbook.add_format({'num_format': '#,###.00'})
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
-    title_format = workbook.add_format({'bold': True, 'font_size': 14, 'align': 'center'})
-    
     # Quarter title
-    worksheet.merge_range(start_row, 0, start_row, 3, f'Quarter {q_num} Summary', title_format)
+    worksheet.merge_range(start_row, 0, start_row, 3, f'Quarter {q_num} Summary', formats['title'])
     start_row += 1
 
-    # Write header
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(start_row, col_num, value, header_format)
-
-    # Write data rows
-    cat_col_idx = df.columns.get_loc('Category')
-    for row_num, row_data in enumerate(df.itertuples(index=False), start_row + 1):
-        for col_num, cell_data in enumerate(row_data):
-            if col_num == cat_col_idx:
-                url = f"internal:'{cell_data}'!A1"
-                worksheet.write_url(row_num, col_num, url, cell_format=url_format, string=cell_data)
-            else:
-                if isinstance(cell_data, (int, float)):
-                    worksheet.write_number(row_num, col_num, cell_data, num_format)
-                else:
-                    worksheet.write(row_num, col_num, cell_data)
+    write_linked_table(writer, worksheet, df, start_row, formats['centered_header'], links={'Category': _link_to_self})
 
     # Add a bar chart
-    if 'Planned' in df.columns and 'Spent' in df.columns and not df.empty:
-        chart = workbook.add_chart({'type': 'column'})
-        num_rows = len(df)
-        
-        cat_col_idx = df.columns.get_loc('Category')
-        plan_col_idx = df.columns.get_loc('Planned')
-        spent_col_idx = df.columns.get_loc('Spent')
+    add_planned_vs_spent_chart(workbook, worksheet, df, sheet_name, start_row, f'Quarter {q_num} Planned vs. Spent',
+                               start_row, df.shape[1] + 3)
 
-        categories_ref = f"='{sheet_name}'!${xl_col_to_name(cat_col_idx)}${start_row + 2}:${xl_col_to_name(cat_col_idx)}${start_row + num_rows + 1}"
-        planned_ref = f"='{sheet_name}'!${xl_col_to_name(plan_col_idx)}${start_row + 2}:${xl_col_to_name(plan_col_idx)}${start_row + num_rows + 1}"
-        spent_ref = f"='{sheet_name}'!${xl_col_to_name(spent_col_idx)}${start_row + 2}:${xl_col_to_name(spent_col_idx)}${start_row + num_rows + 1}"
-        
-        chart.add_series({
-            'name': 'Planned', 'categories': categories_ref, 'values': planned_ref,
-            'fill': {'color': 'green'},
-        })
-        chart.add_series({
-            'name': 'Spent', 'values': spent_ref, 'fill': {'color': 'red'},
-        })
-        
-        chart.set_title({'name': f'Quarter {q_num} Planned vs. Spent'})
-        chart.set_x_axis({'name': 'Category', 'text_axis': True, 'num_font': {'rotation': 45}})
-        chart.set_y_axis({'name': 'Amount ($)'})
-        chart.set_size({'width': 720, 'height': 576})
-        
-        chart_col = 'G'
-        worksheet.insert_chart(start_row, df.shape[1] + 3, chart)
+
+def _link_ideal_budget(cell_data):
+    return 'Ideal Projection' if cell_data == 'Ideal Budget' else None
 
 
 def write_projection_balances_with_links(writer, df, nav_links, nav_col):
     """Writes the Projection Balances DataFrame to a sheet with a hyperlink for 'Ideal Budget'."""
-    sheet_name = 'Projection Balances'
-    workbook = writer.book
-    worksheet = workbook.add_worksheet(sheet_name)
-    writer.sheets[sheet_name] = worksheet
-
-    # Add formats
-    header_format = workbook.add_format({'bold': True, 'bottom': 1})
-    num_format = workbook.add_format({'num_format': '#,###.00'})
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
-    date_format = workbook.add_format({'num_format': 'mm/dd/yyyy'})
-
-    # Write header
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
-
-    # Write data rows
-    eoy_col_idx = df.columns.get_loc('End of Year')
-    for row_num, row_data in enumerate(df.itertuples(index=False), 1):
-        for col_num, cell_data in enumerate(row_data):
-            if col_num == eoy_col_idx and cell_data == 'Ideal Budget':
-                url = "internal:'Ideal Projection'!A1"
-                worksheet.write_url(row_num, col_num, url, cell_format=url_format, string=cell_data)
-            else:
-                if isinstance(cell_data, datetime.date):
-                    worksheet.write_datetime(row_num, col_num, cell_data, date_format)
-                elif isinstance(cell_data, (int, float)):
-                    if pd.isna(cell_data):
-                        worksheet.write_blank(row_num, col_num, None)
-                    else:
-                        worksheet.write_number(row_num, col_num, cell_data, num_format)
-                else:
-                    worksheet.write(row_num, col_num, cell_data)
-
-    # Add navigation links
-    for i, link_sheet in enumerate(nav_links, start=1):
-        cell = f'{nav_col}{i}'
-        url = f"internal:'{link_sheet}'!A1"
-        worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
-
-    # Auto-adjust column widths
-    for i, col in enumerate(df.columns):
-        column_len = len(col)
-        max_len = df[col].astype(str).map(len).max()
-        if pd.notna(max_len):
-            column_len = max(column_len, max_len)
-        worksheet.set_column(i, i, column_len + 2)
+    write_linked_sheet(writer, df, 'Projection Balances', links={'End of Year': _link_ideal_budget},
+                       nav_links=nav_links, nav_col=nav_col)
 
 
 def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict, xls_name, category_types,
                  ideal_budget, ideal_monthly_sums_dict, diff_outs, q_summary_data, yearly_summary, remaining_expenses, this_year):
     """Write the updated budget to an Excel file"""
-    writer = pd.ExcelWriter(xls_name, engine='xlsxwriter')
+    writer = pd.ExcelWriter(xls_name, engine='xlsxwriter',
+                            engine_kwargs={'options': {'default_date_format': 'mm/dd/yyyy'}})
     nav_links = ['Diffs', 'Q Summary', 'Y Summary', 'Yearly Remaining', 'Expenses', 'Categories', 'Projection Balances']
 
     # Write out the diffs and the summary of quarters
@@ -389,12 +345,9 @@ def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict
     writer.sheets[q_summary_sheet_name] = worksheet
 
     # Add navigation links
-    url_format = workbook.add_format({'color': 'blue', 'underline': 1})
+    url_format = _get_formats(workbook)['url']
     nav_col = 'G'
-    for i, link_sheet in enumerate(nav_links, start=1):
-        cell = f'{nav_col}{i}'
-        url = f"internal:'{link_sheet}'!A1"
-        worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
+    write_nav_panel(worksheet, nav_links, nav_col, url_format)
 
     # Calculate max column widths across all quarters first
     col_widths = {}
@@ -405,9 +358,8 @@ def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict
         df_q = pd.DataFrame(data)
         all_q_dfs.append(df_q)
         for i, col in enumerate(df_q.columns):
-            max_len = max(df_q[col].astype(str).map(len).max(), len(col))
-            if pd.notna(max_len):
-                col_widths[i] = max(col_widths.get(i, 0), max_len)
+            max_len = max(_max_str_len(df_q[col]), len(col))
+            col_widths[i] = max(col_widths.get(i, 0), max_len)
 
     # Set column widths once for the entire sheet
     for i, width in col_widths.items():
@@ -416,33 +368,28 @@ def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict
     start_row = 0
     q_num_counter = 1
     for df_q in all_q_dfs:
-        df_q.sort_values('Category', inplace=True)
+        df_q = df_q.sort_values('Category', kind='stable', ignore_index=True)
         
         write_quarterly_summary_sheet(writer, df_q, q_summary_sheet_name, start_row, q_num_counter)
         start_row += 30  # Adjust spacing for next table/chart
         q_num_counter += 1
 
     df_yearly = pd.DataFrame(yearly_summary)
-    df_yearly.sort_values('Category', inplace=True)
+    df_yearly = df_yearly.sort_values('Category', kind='stable', ignore_index=True)
     write_summary_sheet_with_links(writer, df_yearly, 'Y Summary', nav_links=nav_links, nav_col='G')
 
     # Create the Yearly Remaining sheet with 5-year projection
     # Update the year columns to be programmatic (5 years ahead)
     current_year = this_year
     years_ahead = 5
-    remaining_expenses_with_programmatic_years = {'Category': remaining_expenses['Category']}
-    
-    for i in range(years_ahead):
-        year = current_year + i
-        year_key = str(year)
-        if year_key in remaining_expenses:
-            remaining_expenses_with_programmatic_years[str(year)] = remaining_expenses[year_key]
-        else:
-            # If the year doesn't exist in the data, fill with zeros
-            remaining_expenses_with_programmatic_years[str(year)] = [0.0] * len(remaining_expenses['Category'])
-    
+    # Years missing from the data are filled with zeros (one shared list is fine, pd.DataFrame copies it)
+    zeros = [0.0] * len(remaining_expenses['Category'])
+    year_keys = [str(current_year + i) for i in range(years_ahead)]
+    remaining_expenses_with_programmatic_years = {'Category': remaining_expenses['Category'],
+                                                  **{key: remaining_expenses.get(key, zeros) for key in year_keys}}
+
     df_remaining = pd.DataFrame(remaining_expenses_with_programmatic_years)
-    df_remaining.sort_values('Category', inplace=True)
+    df_remaining = df_remaining.sort_values('Category', kind='stable', ignore_index=True)
     write_summary_sheet_with_links(writer, df_remaining, 'Yearly Remaining', nav_links=nav_links, nav_col='H')
 
     # Recreate the initial sheets
@@ -464,33 +411,31 @@ def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict
             write_sheet_with_nav_panel(writer, df_balances, 'Balances', nav_links, 'E')
         else:
             df_initial = pd.DataFrame(dict_initial)
-            df_initial.to_excel(writer, sheet_name=dict_name, index=False, na_rep='')
+            write_dataframe_sheet(writer, df_initial, dict_name)
             make_xls_pretty(writer, df_initial, dict_name)
 
     # Get key date balances
     # this_year = datetime.date.today().year
     end_of_years = [datetime.date(this_year + i, 12, 31) for i in range(0, 6)]
-    last_amount_in_years = []
-    # Use the last available projection on or before each year-end; fallback to 0.0 if none
-    for end_of_year in end_of_years:
-        eligible_indices = [i for i, d in enumerate(projection_dict['Date']) if d <= end_of_year]
-        if eligible_indices:
-            idx = max(eligible_indices)
-            last_amount_in_years.append(projection_dict['Balance'][idx])
-        else:
-            last_amount_in_years.append(0.0)
+    # Use the last available projection on or before each year-end; fallback to 0.0 if none.
+    # One pass files each date under the first year-end it falls before, then a running max spreads it to later years
+    last_idx = [-1] * len(end_of_years)
+    for i, d in enumerate(projection_dict['Date']):
+        year_idx = bisect_left(end_of_years, d)
+        if year_idx < len(end_of_years):
+            last_idx[year_idx] = i
+    last_amount_in_years = [projection_dict['Balance'][idx] if idx >= 0 else 0.0
+                            for idx in accumulate(last_idx, max)]
 
     # Make the projection sheet
     print(f'Writing new budget xls: {xls_name}')
-    dates_to_str(projection_dict)
     df_projection = pd.DataFrame(projection_dict)
-    df_projection.to_excel(writer, sheet_name='Projection', index=False, na_rep='')
+    write_dataframe_sheet(writer, df_projection, 'Projection')
     make_xls_pretty(writer, df_projection, 'Projection')
 
     # Make the ideal projection sheet
-    dates_to_str(ideal_budget)
     df_ideal = pd.DataFrame(ideal_budget)
-    df_ideal.to_excel(writer, sheet_name='Ideal Projection', index=False, na_rep='')
+    write_dataframe_sheet(writer, df_ideal, 'Ideal Projection')
     make_xls_pretty(writer, df_ideal, 'Ideal Projection')
 
     projection_balances = {'End of Year': end_of_years, 'Balance': last_amount_in_years}
@@ -513,72 +458,69 @@ def write_budget(budget_dict, projection_dict, initial_sheets, monthly_sums_dict
     m_categories.sort()
     preferred_order = ['Interest'] + loan_categories + yearly_categories + q_categories + m_categories
     new_top_categories = big_rocks + preferred_order
-    other_categories = [x for x in categories if x not in new_top_categories]
-    other_categories.sort()
+    top_set = frozenset(new_top_categories)
+    other_categories = sorted(x for x in categories if x not in top_set)
     categories_organized = new_top_categories + other_categories
 
     # Create the monthly sums sheet
     final_monthly_dict = finalize_monthly_dict(categories_organized, monthly_sums_dict)
 
     df_monthly_sums = pd.DataFrame(final_monthly_dict)
-    df_monthly_sums.to_excel(writer, sheet_name='Monthly', index=False, na_rep='')
+    write_dataframe_sheet(writer, df_monthly_sums, 'Monthly')
     make_xls_pretty(writer, df_monthly_sums, 'Monthly', all=True)
 
     # Create the ideal monthly sums sheet
     final_ideal_monthly_dict = finalize_monthly_dict(categories_organized, ideal_monthly_sums_dict)
 
     df_ideal_monthly_sums = pd.DataFrame(final_ideal_monthly_dict)
-    df_ideal_monthly_sums.to_excel(writer, sheet_name='Ideal Monthly', index=False, na_rep='')
+    write_dataframe_sheet(writer, df_ideal_monthly_sums, 'Ideal Monthly')
     make_xls_pretty(writer, df_ideal_monthly_sums, 'Ideal Monthly', all=True)
 
     # Loop over each category and create the spreadsheet
+    monthly_set = frozenset(category_types['Monthly'])
+    loan_set = frozenset(category_types['Loan'])
     for category in categories_organized:
         if category not in budget_dict:
             continue
-        # print(category)
-        category_budget_raw = budget_dict[category]
-        category_budget = make_dict_list_same_len(category_budget_raw)
-        dates_to_str(category_budget)
-        df = pd.DataFrame(category_budget)
-
-        # Remove 'Remaining' from category sheets (it should not appear there)
-        if 'Remaining' in df.columns:
-            df = df.drop(columns=['Remaining'])
-
-        # If Month in df columns then add empty column at position 5
-        if 'End of Month' in df.columns and category not in category_types['Monthly'] and ' ' not in df.columns:
-            if category in category_types['Loan']:
-                df.insert(loc=5, column=' ', value=['' for i in range(df.shape[0])])
-            else:
-                df.insert(loc=6, column=' ', value=['' for i in range(df.shape[0])])
-
-        sheet_created = False
-        if 'Actual' in df.columns and 'Planned' in df.columns:
-            p_sum = sum([abs(x) for x in df.Actual if x != '']) + sum([abs(x) for x in df.Planned if x != ''])
-            if abs(p_sum) > 0.0:
-                df.to_excel(writer, sheet_name=category, index=False, na_rep='')
-                make_xls_pretty(writer, df, category)
-                sheet_created = True
-            else:
-                print(f'This category budget is empty: {category}')
-        else:
-            df.to_excel(writer, sheet_name=category, index=False, na_rep='')
-            make_xls_pretty(writer, df, category)
-            sheet_created = True
-
-        if sheet_created:
-            # Add navigation links to the sheet
-            worksheet = writer.sheets[category]
-            url_format = writer.book.add_format({'color': 'blue', 'underline': 1})
-            
-            for i, link_sheet in enumerate(nav_links, start=1):
-                cell = f'O{i}'
-                url = f"internal:'{link_sheet}'!A1"
-                worksheet.write_url(cell, url, cell_format=url_format, string=link_sheet)
+        df = prepare_category_sheet(budget_dict[category], category in monthly_set, category in loan_set)
+        if df is None:
+            print(f'This category budget is empty: {category}')
+            continue
+        write_dataframe_sheet(writer, df, category)
+        make_xls_pretty(writer, df, category)
+
+        # Add navigation links to the sheet
+        worksheet = writer.sheets[category]
+        write_nav_panel(worksheet, nav_links, 'O', url_format)
 
     writer.close()
 
 
+def prepare_category_sheet(category_budget_raw, is_monthly, is_loan):
+    """Build the DataFrame for a category sheet, or None if the category budget is empty"""
+    category_budget = make_dict_list_same_len(category_budget_raw)
+    dates_to_str(category_budget)
+    df = pd.DataFrame(category_budget)
+
+    # Remove 'Remaining' from category sheets (it should not appear there)
+    if 'Remaining' in df.columns:
+        df = df.drop(columns=['Remaining'])
+
+    # If Month in df columns then add empty column at position 5
+    if 'End of Month' in df.columns and not is_monthly and ' ' not in df.columns:
+        if is_loan:
+            df.insert(loc=5, column=' ', value=['' for i in range(df.shape[0])])
+        else:
+            df.insert(loc=6, column=' ', value=['' for i in range(df.shape[0])])
+
+    if 'Actual' in df.columns and 'Planned' in df.columns:
+        p_sum = df[['Actual', 'Planned']].apply(pd.to_numeric, errors='coerce').abs().sum().sum()
+        if p_sum == 0.0:
+            return None
+
+    return df
+
+
 def remove_specials(my_str):
     return my_str.replace('Loan - ', '').replace('M ', '',).replace('Y ', '').replace('Q ', '')
 
@@ -589,31 +531,20 @@ def finalize_monthly_dict(categories_organized, monthly_sums_dict):
     monthly_headers = [
         f'{datetime.date(datetime.date.today().year, i + 1, 1).strftime("%B")} {datetime.date.today().year}'
         for i in range(0, 12)]
-    monthly_dict = {'Categories': categories_organized}
     categories_update = [x for x in categories_organized
                          if x in monthly_sums_dict.keys()]
-    for i, monthly_header in enumerate(monthly_headers):
-        monthly_dict[monthly_header] = [0.0]*len(categories_update)
-        for c, category in enumerate(categories_update):
-            for this_line in monthly_sums_dict[category]:
-                if i + 1 == this_line[0].month:
-                    monthly_dict[monthly_header][c] = this_line[1]
-                    break
-    monthly_dict['Categories'] = categories_update
-    monthly_dict['Categories'].append('Monthly Total')
-    monthly_sums = [sum(monthly_dict[x]) for x in monthly_dict.keys() if x != 'Categories']
-    c = 0
-    new_monthly_dict = monthly_dict.copy()
-    for m_key, m_list in monthly_dict.items():
-        if m_key != 'Categories':
-            new_monthly_dict[m_key].append(monthly_sums[c])
-            c += 1
-    final_monthly_dict = new_monthly_dict.copy()
-    final_monthly_dict['Yearly'] = [0.0]*len(categories_update)
-    for c, category in enumerate(categories_update):
-        sums = 0.0
-        for m, month in enumerate(list(new_monthly_dict.keys())[1:]):
-            sums += final_monthly_dict[month][c]
-        final_monthly_dict['Yearly'][c] = sums
-
-    return final_monthly_dict
+
+    # Pivot the monthly sums into a category x month table, keeping the first sum found for each month
+    monthly_sums = pd.DataFrame([(category, this_line[0].month, this_line[1]) for category in categories_update
+                                 for this_line in monthly_sums_dict[category]],
+                                columns=['Category', 'Month', 'Sum'])
+    monthly_sums = monthly_sums.drop_duplicates(['Category', 'Month'])
+    monthly_table = monthly_sums.pivot(index='Category', columns='Month', values='Sum')
+    monthly_table = monthly_table.reindex(index=categories_update, columns=range(1, 13)).astype(float).fillna(0.0)
+    monthly_table.columns = monthly_headers
+
+    # Add the sum column and row, then hand the table back as lists without copying it column by column
+    monthly_table['Yearly'] = monthly_table.sum(axis=1)
+    monthly_table.loc['Monthly Total'] = monthly_table.sum(axis=0)
+
+    return {'Categories': monthly_table.index.tolist(), **monthly_table.to_dict('list')}
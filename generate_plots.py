@@ -1,19 +1,12 @@
 #!/usr/bin/env python3
 import argparse
-from visualization import (
-    setup_plotting_style, load_transaction_data, load_budget_data,
-    plot_monthly_spending_by_category, plot_spending_trend_over_time,
-    plot_income_vs_expenses, plot_balance_projection, plot_spending_by_account,
-    plot_monthly_budget_vs_actual, generate_all_plots
-)
-from budget_comparison import (
-    compare_and_plot_budget_versions, get_budget_versions, get_transaction_versions,
-    compare_and_plot_transaction_versions
-)
 from config import get_transactions_path, get_budget_path
 
-def main():
-    """Main CLI function to generate plots"""
+# The plotting modules (matplotlib, seaborn, pandas) are imported inside main only for the commands that need them,
+# so --help and argument errors return without loading them
+
+def build_parser():
+    """Build the command line parser for generate_plots"""
     parser = argparse.ArgumentParser(description='Generate financial plots from transaction and budget data')
     
     # Standard visualization options
@@ -60,11 +53,17 @@ def main():
     
     parser.add_argument('--list-versions', action='store_true',
                         help='List available budget and transaction file versions')
-    
-    args = parser.parse_args()
+
+    return parser
+
+
+def main(argv=None):
+    """Main CLI function to generate plots"""
+    args = build_parser().parse_args(argv)
     
     # List available versions if requested
     if args.list_versions:
+        from budget_comparison import get_budget_versions, get_transaction_versions
         budget_versions = get_budget_versions()
         transaction_versions = get_transaction_versions()
         
@@ -80,6 +79,7 @@ def main():
     
     # Handle budget comparison if requested
     if args.compare_budgets:
+        from budget_comparison import compare_and_plot_budget_versions
         print("Comparing budget versions...")
         compare_and_plot_budget_versions(
             current_file=args.current_budget,
@@ -91,6 +91,7 @@ def main():
     
     # Handle transaction comparison if requested
     if args.compare_transactions:
+        from budget_comparison import compare_and_plot_transaction_versions
         print("Comparing transaction versions...")
         compare_and_plot_transaction_versions(
             current_file=args.current_transactions,
@@ -100,53 +101,57 @@ def main():
         )
         return
     
+    import visualization
+
     # Set up plotting style
-    setup_plotting_style()
-    
-    # Load data
-    transactions_df = load_transaction_data(args.transactions)
-    budget_data = load_budget_data(args.budget)
-    
+    visualization.setup_plotting_style()
+
     save = not args.no_save
-    
+
+    def plot_budget_vs_actual(transactions_df, budget_data):
+        # Default to some important categories
+        important_categories = ['Groceries', 'Restaurant', 'Mortgage', 'Auto - Gas', 'Home Supplies']
+        for category in args.budget_categories or important_categories:
+            print(f"Generating budget vs actual plot for {category}...")
+            visualization.plot_monthly_budget_vs_actual(budget_data, transactions_df, category, save=save)
+
+    # Each specific plot flag maps to its progress message and a callback taking the transactions and budget data
+    plot_commands = {
+        'top_spending': (f"Generating top {args.top_n} spending categories plot...",
+                         lambda transactions_df, budget_data: visualization.plot_monthly_spending_by_category(
+                             transactions_df, top_n=args.top_n, save=save)),
+        'spending_trend': ("Generating spending trend plot...",
+                           lambda transactions_df, budget_data: visualization.plot_spending_trend_over_time(
+                               transactions_df, top_categories=args.categories, save=save)),
+        'income_vs_expenses': ("Generating income vs expenses plot...",
+                               lambda transactions_df, budget_data: visualization.plot_income_vs_expenses(
+                                   transactions_df, save=save)),
+        'balance_projection': ("Generating balance projection plot...",
+                               lambda transactions_df, budget_data: visualization.plot_balance_projection(
+                                   budget_data, save=save)),
+        'by_account': ("Generating spending by account plot...",
+                       lambda transactions_df, budget_data: visualization.plot_spending_by_account(
+                           transactions_df, save=save)),
+        # Prints its own message for each category
+        'budget_vs_actual': (None, plot_budget_vs_actual),
+    }
+    requested = [flag for flag in plot_commands if getattr(args, flag)]
+
     # Generate all plots if requested or if no specific plots are requested
-    if args.all or not any([args.top_spending, args.spending_trend, args.income_vs_expenses, 
-                           args.balance_projection, args.by_account, args.budget_vs_actual]):
+    if args.all or not requested:
         print("Generating all plots...")
-        generate_all_plots()
+        visualization.generate_all_plots()
     else:
+        # Load data
+        transactions_df = visualization.load_transaction_data(args.transactions)
+        budget_data = visualization.load_budget_data(args.budget)
+
         # Generate specific plots as requested
-        if args.top_spending:
-            print(f"Generating top {args.top_n} spending categories plot...")
-            plot_monthly_spending_by_category(transactions_df, top_n=args.top_n, save=save)
-        
-        if args.spending_trend:
-            print("Generating spending trend plot...")
-            plot_spending_trend_over_time(transactions_df, top_categories=args.categories, save=save)
-        
-        if args.income_vs_expenses:
-            print("Generating income vs expenses plot...")
-            plot_income_vs_expenses(transactions_df, save=save)
-        
-        if args.balance_projection:
-            print("Generating balance projection plot...")
-            plot_balance_projection(budget_data, save=save)
-        
-        if args.by_account:
-            print("Generating spending by account plot...")
-            plot_spending_by_account(transactions_df, save=save)
-        
-        if args.budget_vs_actual:
-            if args.budget_categories:
-                for category in args.budget_categories:
-                    print(f"Generating budget vs actual plot for {category}...")
-                    plot_monthly_budget_vs_actual(budget_data, transactions_df, category, save=save)
-            else:
-                # Default to some important categories
-                important_categories = ['Groceries', 'Restaurant', 'Mortgage', 'Auto - Gas', 'Home Supplies']
-                for category in important_categories:
-                    print(f"Generating budget vs actual plot for {category}...")
-                    plot_monthly_budget_vs_actual(budget_data, transactions_df, category, save=save)
+        for flag in requested:
+            message, plot = plot_commands[flag]
+            if message:
+                print(message)
+            plot(transactions_df, budget_data)
     
     print("Plot generation completed!")
 
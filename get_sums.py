@@ -1,93 +1,140 @@
-from datetime import datetime, date
-from utilities import remove_list_blanks, end_of_month, in_this_month, range_eom_dates
+from datetime import datetime
+from itertools import compress
+from utilities import remove_list_blanks
+import numpy as np
 import pandas as pd
 
+# Quarter index (0-3) of each month, indexed by month - 1
+MONTH_TO_QUARTER = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3], dtype=np.int8)
+
+
+def transaction_arrays(dates, amounts, transactions_categories=None):
+    """Convert parallel transaction lists to NumPy arrays the sum functions can use without per-row work.
+
+    Dates become datetime64[D] (NaT when unparseable), amounts float64 with blanks as zero and categories a
+    pd.Categorical, so category filters compare integer codes instead of strings.
+    """
+    dates_out = pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce').to_numpy().astype('datetime64[D]')
+    amounts_out = np.asarray(remove_list_blanks(amounts), dtype=np.float64)
+    categories_out = None if transactions_categories is None else pd.Categorical(transactions_categories)
+    return dates_out, amounts_out, categories_out
+
+
+def _month_array(dates):
+    """Get the datetime64[M] month of each date (NaT when unparseable)"""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[M]')
+    return pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce').to_numpy().astype('datetime64[M]')
+
+
+def _category_mask(category, transactions_categories):
+    """Get the rows in the category, or None when there is no category filter"""
+    if not category or transactions_categories is None or len(transactions_categories) == 0:
+        return None
+    if isinstance(transactions_categories, pd.Categorical):
+        code = transactions_categories.categories.get_indexer([category])[0]
+        # An absent category has code -1, which is also the code of missing values, so it matches no rows
+        if code < 0:
+            return np.zeros(len(transactions_categories), dtype=bool)
+        return transactions_categories.codes == code
+    return np.asarray(transactions_categories) == category
+
+
+def _amount_array(amounts, keep):
+    """Get the kept amounts as float64, turning blanks into zeros"""
+    if isinstance(amounts, np.ndarray) and amounts.dtype.kind == 'f':
+        return amounts[keep]
+    # Filter first so the per-amount blank cleanup only sees the rows that are summed
+    return np.asarray(remove_list_blanks(list(compress(amounts, keep))), dtype=np.float64)
+
+
+def _month_grid(dates):
+    """Get the month-end dates spanning the dates, each date's month, its month offset and which dates are valid"""
+    months = _month_array(dates)
+    keep = ~np.isnat(months)
+    if not keep.any():
+        return [], months, None, keep
+    # The month grid runs from the earliest to the latest month, no sort needed; each month ends the day before the next
+    first_month, last_month = months[keep].min(), months[keep].max()
+    month_grid = np.arange(first_month, last_month + 1)
+    monthly_dates = ((month_grid + 1).astype('datetime64[D]') - 1).tolist()
+    return monthly_dates, months, first_month, keep
+
 
 def get_monthly_sums(category, dates, amounts, transactions_categories):
     """Function to get a list of the month sums per month"""
 
+    if len(dates) == 0:
+        return []
+
     # Get the monthly series in this time series
-    dates_sorted = dates.copy()
-    try:
-        dates_sorted.sort()
-    except TypeError:
-        print('pass')
-        # dates_sorted = [date if pd.notna(date) else None for date in dates_sorted]
-        # dates_sorted.sort(key=lambda x: (x is None, x))
-
-    if not dates:
+    monthly_dates, months, first_month, keep = _month_grid(dates)
+    if not monthly_dates:
         return []
-    try:
-        monthly_dates = range_eom_dates(dates_sorted[0], dates_sorted[-1])
-    except UnboundLocalError:
-        print('pass')
 
-    # Find this year's monthly sums
-    amounts_in = remove_list_blanks(amounts)
-    monthly_sums = [0.0]*len(monthly_dates)
-    for d, transaction_date in enumerate(dates):
-        if category and transactions_categories:
-            if category != transactions_categories[d]:
-                continue
-        i_month = [i for i, x in enumerate(monthly_dates) if in_this_month(transaction_date, x)]
-        if i_month:
-            monthly_sums[i_month[0]] += amounts_in[d]
+    # Find this year's monthly sums: bin each amount by its month offset and add the bins up in one pass
+    category_mask = _category_mask(category, transactions_categories)
+    if category_mask is not None:
+        keep &= category_mask
+    month_bins = (months[keep] - first_month).astype(np.int64)
+    amounts_in = _amount_array(amounts, keep)
+    # (bincount gives ints when nothing is left to add, so cast back to floats)
+    monthly_sums = np.bincount(month_bins, weights=amounts_in, minlength=len(monthly_dates)).astype(np.float64)
 
-    return [(monthly_dates[i], x) for i, x in enumerate(monthly_sums)]
+    return list(zip(monthly_dates, monthly_sums.tolist()))
 
 
-def get_quarterly_sums(category, dates, amounts, transactions_categories, expense):
-    """Function to get a list of the month sums per month"""
+def get_all_monthly_sums(dates, amounts, transactions_categories):
+    """Function to get a table of the month sums per month (rows) for every category (columns)"""
 
-    # Find this year's quarterly sums
-    quarterly_sums = [0.0]*4
-    quarterly_months = [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10, 11, 12]]
-    for d, transaction_date in enumerate(dates):
-        if category and transactions_categories:
-            if category != transactions_categories[d]:
-                continue
-        i_quarter = [i for i, x in enumerate(quarterly_months) if transaction_date.month in x][0]
-        quarterly_sums[i_quarter] += amounts[d]
-
-    this_quarter = [i for i, x in enumerate(quarterly_months) if datetime.today().month in x][0]
-    spent = [(i, x) for i, x in enumerate(quarterly_sums)]
-    remaining = []
-    for i in range(0, 4):
-        if i == this_quarter:
-            if spent[i][1] < expense[i]:
-                remaining.append((i, 0.0))
-            else:
-                remaining.append((i, expense[i] - spent[i][1]))
-        elif i < this_quarter:
-            remaining.append((i, 0.0))
-        else:
-            remaining.append((i, expense[i]))
-
-
-    # # Find the current quarter
-    # this_quarter = [i for i, x in enumerate(quarterly_months) if datetime.today().month in x][0]
-    # quarters_remaining = 4 - this_quarter - 1
-    # remaining = []
-    # pile = float(sum(expense))
-    # for q in range(0, 4):
-    #     if q < this_quarter:
-    #         remaining.append((q, 0.0))
-    #         pile -= quarterly_sums[q]
-    #         if pile > 0.0:
-    #             pile = 0.0
-    #     elif q == this_quarter:
-    #         diff = pile/(quarters_remaining + 1) - quarterly_sums[q]
-    #         if diff > 0.0:
-    #             pile -= quarterly_sums[q]
-    #             remaining.append((q, 0.0))
-    #         else:
-    #             remaining.append((q, diff))
-    #     else:
-    #         left = pile/(quarters_remaining + 1)
-    #         remaining.append((q, left))
-    #
-    # spent = [(i, x) for i, x in enumerate(quarterly_sums)]
+    categories = transactions_categories
+    if not isinstance(categories, pd.Categorical):
+        categories = pd.Categorical(categories)
+    monthly_dates, months, first_month, keep = _month_grid(dates)
+    if not monthly_dates:
+        return pd.DataFrame(columns=categories.categories, dtype=np.float64)
+
+    # Bin each amount by its category and month offset together, so one pass fills the whole table
+    keep &= categories.codes >= 0
+    n_months = len(monthly_dates)
+    bins = categories.codes[keep].astype(np.int64) * n_months + (months[keep] - first_month).astype(np.int64)
+    sums = np.bincount(bins, weights=_amount_array(amounts, keep), minlength=len(categories.categories) * n_months)
+    sums = sums.astype(np.float64).reshape(len(categories.categories), n_months).T
+    return pd.DataFrame(sums, index=monthly_dates, columns=categories.categories)
 
-    return spent, remaining
 
+def get_category_monthly_sums(all_monthly_sums, category):
+    """Function to get a category's list of the month sums per month from the get_all_monthly_sums table"""
+    if category in all_monthly_sums.columns:
+        return list(zip(all_monthly_sums.index, all_monthly_sums[category].tolist()))
+    return [(x, 0.0) for x in all_monthly_sums.index]
 
+
+def get_quarterly_sums(category, dates, amounts, transactions_categories, expense):
+    """Function to get lists of the spent and remaining sums per quarter"""
+
+    # Find this year's quarterly sums: bin each amount by its quarter index
+    keep = np.ones(len(dates), dtype=bool)
+    category_mask = _category_mask(category, transactions_categories)
+    if category_mask is not None:
+        keep &= category_mask
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        # Unparseable dates (NaT) have no quarter
+        keep &= ~np.isnat(dates)
+        months = dates[keep].astype('datetime64[M]').astype(np.int64) % 12 + 1
+    else:
+        months = np.fromiter((x.month for x in compress(dates, keep)), dtype=np.int64, count=int(keep.sum()))
+    amounts_in = _amount_array(amounts, keep)
+    quarterly_sums = np.bincount(MONTH_TO_QUARTER[months - 1], weights=amounts_in, minlength=4).astype(np.float64)
+
+    # Past quarters have nothing left, this quarter what is left of its expense, and future quarters the full expense
+    this_quarter = MONTH_TO_QUARTER[datetime.today().month - 1]
+    quarters = np.arange(4)
+    expense_in = np.asarray(expense[:4], dtype=np.float64)
+    this_remaining = np.where(quarterly_sums < expense_in, 0.0, expense_in - quarterly_sums)
+    remaining_sums = np.where(quarters < this_quarter, 0.0,
+                              np.where(quarters == this_quarter, this_remaining, expense_in))
+    spent = list(enumerate(quarterly_sums.tolist()))
+    remaining = list(enumerate(remaining_sums.tolist()))
+
+    return spent, remaining
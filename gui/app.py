@@ -6,9 +6,10 @@ import tempfile
 import datetime
 from contextlib import redirect_stdout
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import altair as alt
 from typing import Optional, Tuple
@@ -158,6 +159,7 @@ if PROJECT_ROOT not in sys.path:
 from BudgetMeeting import update_budget, BudgetMeeting as run_budget_meeting  # noqa: E402
 from transactions import get_transactions, update_auto_categories  # noqa: E402
 from config import get_budget_path, get_transactions_path, get_archive_dir  # noqa: E402
+from utilities import EXCEL_READ_ENGINE  # noqa: E402
 
 
 def file_exists(path: str) -> bool:
@@ -167,6 +169,14 @@ def file_exists(path: str) -> bool:
         return False
 
 
+def file_mtime(path: str) -> float | None:
+    """Modification time of a file, used to key the cached readers (None if it is missing)."""
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
 def run_budget_meeting_live(budget_xlsx: str, transactions_xlsx: str, year: int) -> str:
     """Run the full BudgetMeeting flow and return captured logs.
 
@@ -197,6 +207,17 @@ def run_budget_meeting_preview(original_budget_xlsx: str, transactions_xlsx: str
     return preview_path, log_buffer.getvalue()
 
 
+def read_transactions_sheet(transactions_xlsx: str) -> pd.DataFrame:
+    # Reuse the parsed transactions across reruns and charts while the file is unchanged
+    return _read_transactions_sheet(transactions_xlsx, file_mtime(transactions_xlsx))
+
+
+@st.cache_data(show_spinner=False)
+def _read_transactions_sheet(transactions_xlsx: str, mtime: float | None) -> pd.DataFrame:
+    """Parse the Transactions sheet (mtime is only part of the cache key)."""
+    return pd.read_excel(transactions_xlsx, sheet_name="Transactions", engine=EXCEL_READ_ENGINE)
+
+
 def _get_transactions_df(transactions_xlsx: str) -> Optional[dict]:
     """Load transactions.xlsx into dict format expected by update_budget (or return None).
 
@@ -205,7 +226,7 @@ def _get_transactions_df(transactions_xlsx: str) -> Optional[dict]:
     if not file_exists(transactions_xlsx):
         return None
     try:
-        df = pd.read_excel(transactions_xlsx, sheet_name="Transactions")
+        df = read_transactions_sheet(transactions_xlsx)
         df.fillna("", inplace=True)
         # Normalize Date column to date objects if present
         if "Date" in df.columns:
@@ -215,98 +236,145 @@ def _get_transactions_df(transactions_xlsx: str) -> Optional[dict]:
         return None
 
 
+# Sheets the results tabs show; they are parsed together while the workbook is open
+VIEWER_SHEETS = ("Diffs", "Q Summary", "Y Summary", "Yearly Remaining", "Projection", "Monthly", "Categories",
+                 "Balances")
+
+
+@st.cache_data(show_spinner=False)
+def _read_workbook(xlsx_path: str, mtime: float | None) -> dict:
+    """Open the workbook once and parse its sheet names, the viewer sheets and the raw 'Q Summary' grid
+    (mtime is only part of the cache key). A sheet that is missing or fails to parse is None."""
+
+    def parse_or_none(xls: pd.ExcelFile, sheet_name: str, **kwargs) -> pd.DataFrame | None:
+        try:
+            return xls.parse(sheet_name=sheet_name, **kwargs)
+        except Exception:
+            return None
+
+    with pd.ExcelFile(xlsx_path, engine=EXCEL_READ_ENGINE) as xls:
+        sheet_names = xls.sheet_names
+        sheets = {name: parse_or_none(xls, name) for name in VIEWER_SHEETS if name in sheet_names}
+        q_summary_raw = parse_or_none(xls, "Q Summary", header=None) if "Q Summary" in sheet_names else None
+    return {"sheet_names": sheet_names, "sheets": sheets, "q_summary_raw": q_summary_raw}
+
+
+def list_sheets(xlsx_path: str) -> list[str]:
+    return _list_sheets(xlsx_path, file_mtime(xlsx_path))
+
+
+@st.cache_data(show_spinner=False)
+def _list_sheets(xlsx_path: str, mtime: float | None) -> list[str]:
+    """List the workbook's sheets (mtime is only part of the cache key)."""
+    return _read_workbook(xlsx_path, mtime)["sheet_names"]
+
+
 def read_sheet(xlsx_path: str, sheet_name: str) -> pd.DataFrame | None:
+    # Reuse the parsed sheet across reruns while the file is unchanged
+    return _read_sheet(xlsx_path, sheet_name, file_mtime(xlsx_path))
+
+
+@st.cache_data(show_spinner=False)
+def _read_sheet(xlsx_path: str, sheet_name: str, mtime: float | None) -> pd.DataFrame | None:
+    """Parse one sheet (mtime is only part of the cache key)."""
     try:
-        return pd.read_excel(xlsx_path, sheet_name=sheet_name)
+        if sheet_name in VIEWER_SHEETS:
+            return _read_workbook(xlsx_path, mtime)["sheets"].get(sheet_name)
+        with pd.ExcelFile(xlsx_path, engine=EXCEL_READ_ENGINE) as xls:
+            return xls.parse(sheet_name=sheet_name)
     except Exception:
         return None
 
 
 def read_q_summary_sections(xlsx_path: str) -> dict[int, pd.DataFrame] | None:
+    # Reuse the parsed sections across reruns while the file is unchanged
+    return _read_q_summary_sections(xlsx_path, file_mtime(xlsx_path))
+
+
+@st.cache_data(show_spinner=False)
+def _read_q_summary_sections(xlsx_path: str, mtime: float | None) -> dict[int, pd.DataFrame] | None:
     """Parse the 'Q Summary' sheet into 4 separate quarter DataFrames.
 
     The writer lays out sections as blocks with a title row 'Quarter X Summary',
     followed by a header row ['Category','Planned','Spent','Remaining'], then rows.
+    (mtime is only part of the cache key.)
     """
     try:
-        raw = pd.read_excel(xlsx_path, sheet_name='Q Summary', header=None)
+        raw = _read_workbook(xlsx_path, mtime)["q_summary_raw"]
     except Exception:
         return None
+    if raw is None:
+        return None
 
     sections: dict[int, pd.DataFrame] = {}
-    i = 0
     n = len(raw)
-    while i < n:
-        cell = raw.iat[i, 0] if 0 in raw.columns else None
-        if isinstance(cell, str) and cell.strip().startswith('Quarter'):
-            # Extract quarter number
-            try:
-                q_num = int(cell.split()[1])
-            except Exception:
-                q_num = None
-            # Header is next row
-            header_row = i + 1
-            if header_row < n:
-                headers = raw.iloc[header_row].tolist()
-                # Collect data rows until next title or empty header repeat
-                data_start = header_row + 1
-                data_rows = []
-                r = data_start
-                while r < n:
-                    first = raw.iat[r, 0] if 0 in raw.columns else None
-                    # Stop if next section title encountered
-                    if isinstance(first, str) and first.strip().startswith('Quarter'):
-                        break
-                    # Stop if completely empty row
-                    if pd.isna(first) and all(pd.isna(x) for x in raw.iloc[r].tolist()):
-                        break
-                    data_rows.append(raw.iloc[r].tolist())
-                    r += 1
-                if q_num is not None and headers:
-                    df = pd.DataFrame(data_rows, columns=[str(h) for h in headers])
-                    # Trim to expected columns if present
-                    keep = [c for c in ['Category', 'Planned', 'Spent', 'Remaining'] if c in df.columns]
-                    df = df[keep] if keep else df
-                    # Drop rows with all NaNs in numeric cols
-                    for col in ['Planned', 'Spent', 'Remaining']:
-                        if col in df.columns:
-                            df[col] = pd.to_numeric(df[col], errors='coerce')
-                    if any(c in df.columns for c in ['Planned', 'Spent', 'Remaining']):
-                        mask = None
-                        for col in ['Planned', 'Spent', 'Remaining']:
-                            if col in df.columns:
-                                mask = df[col].notna() if mask is None else (mask | df[col].notna())
-                        if mask is not None:
-                            df = df[mask]
-                    sections[q_num] = df.reset_index(drop=True)
-                i = r
-                continue
-        i += 1
+    if n == 0 or 0 not in raw.columns:
+        return None
+    # Find the section titles, and the rows that end a section (the next title or a completely empty row), in one pass
+    col0 = raw[0].to_numpy(dtype=object)
+    is_title = np.array([isinstance(x, str) and x.strip().startswith('Quarter') for x in col0], dtype=bool)
+    stops = np.flatnonzero(is_title | raw.isna().all(axis=1).to_numpy())
+    numeric_cols = ['Planned', 'Spent', 'Remaining']
+    header_row = None
+    for title_row in np.flatnonzero(is_title):
+        # A title sitting in the previous section's header row was read as that header
+        if title_row == header_row:
+            continue
+        # Header is next row
+        header_row = title_row + 1
+        if header_row >= n:
+            continue
+        # Extract quarter number
+        try:
+            q_num = int(col0[title_row].split()[1])
+        except Exception:
+            continue
+        # Data rows run until the next title or empty row
+        data_start = header_row + 1
+        next_stop = np.searchsorted(stops, data_start)
+        data_end = stops[next_stop] if next_stop < len(stops) else n
+        df = raw.iloc[data_start:data_end].copy()
+        df.columns = [str(h) for h in raw.iloc[header_row].tolist()]
+        # Trim to expected columns if present
+        keep = [c for c in ['Category'] + numeric_cols if c in df.columns]
+        df = df[keep] if keep else df
+        # Drop rows with all NaNs in numeric cols
+        present = [c for c in numeric_cols if c in df.columns]
+        if present:
+            df[present] = df[present].apply(pd.to_numeric, errors='coerce')
+            df = df[df[present].notna().any(axis=1)]
+        sections[q_num] = df.reset_index(drop=True)
 
     # Ensure we return quarters 1..4 keys if found
     return sections if sections else None
 
 
+def new_chart_figure(figsize: Tuple[float, float] = (10, 6)):
+    """Create a chart figure without pyplot, so reruns don't build up pyplot-managed figures."""
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
 def show_top_spending_chart(transactions_xlsx: str, top_n: int = 10):
     if not file_exists(transactions_xlsx):
         st.info("Transactions file not found.")
         return
     try:
-        df = pd.read_excel(transactions_xlsx, sheet_name="Transactions")
+        df = read_transactions_sheet(transactions_xlsx)
     except Exception:
         st.info("Unable to read Transactions sheet.")
         return
     if "Amount" not in df.columns or "Category" not in df.columns:
         st.info("Transactions sheet missing required columns.")
         return
-    df = df.copy()
-    # Expenses negative, take absolute for magnitude
-    top = df[df["Amount"] < 0].groupby("Category")["Amount"].sum().abs().nlargest(top_n)
+    # Expenses negative, take absolute for magnitude (only the two needed columns of the expense rows are copied)
+    expenses = df.loc[df["Amount"] < 0, ["Category", "Amount"]]
+    top = expenses.groupby("Category")["Amount"].sum().abs().nlargest(top_n)
     if top.empty:
         st.info("No expense data to chart.")
         return
     sns.set_theme(style="whitegrid")
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_chart_figure()
     palette = LCARS_PALETTE * (len(top) // len(LCARS_PALETTE) + 1)
     sns.barplot(x=top.values, y=top.index, hue=top.index, palette=palette[: len(top)], legend=False, ax=ax)
     ax.set_title(f"Top {top_n} Categories by Spending", color=LCARS_COLORS['text'])
@@ -327,7 +395,8 @@ def show_balance_projection_chart(budget_xlsx: str):
 
     df = df.copy()
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date", "Balance"]).sort_values("Date")
+    # (stable sort so each day's rows keep their order and the last one holds the day's ending balance)
+    df = df.dropna(subset=["Date", "Balance"]).sort_values("Date", kind="stable")
     if df.empty:
         st.info("No projection data to chart.")
         return
@@ -369,7 +438,12 @@ def show_balance_projection_chart(budget_xlsx: str):
     pad = max((y_max - y_min) * 0.05, 1.0)
     y_domain = [y_min - pad, y_max + pad]
 
-    base = alt.Chart(plot_df).encode(
+    # Only chart the plotted columns, one end-of-day point per day, so the Vega-Lite spec stays small
+    chart_df = plot_df[["Date", "Balance"]]
+    if granularity == "Daily":
+        chart_df = chart_df.groupby("Date", as_index=False).last()
+
+    base = alt.Chart(chart_df).encode(
         x=alt.X("Date:T", title="Date"),
         y=alt.Y(
             "Balance:Q",
@@ -412,53 +486,66 @@ def show_balance_projection_chart(budget_xlsx: str):
     st.download_button("Download projection CSV", data=csv, file_name="projection.csv", mime="text/csv")
 
 
-def show_budget_vs_actual_chart(budget_xlsx: str, transactions_xlsx: str, category: str):
-    monthly = read_sheet(budget_xlsx, "Monthly")
+def read_monthly_budgets(budget_xlsx: str) -> tuple[list, np.ndarray, dict] | None:
+    # Prepare the Monthly sheet once per file version for every category the chart is drawn for
+    return _read_monthly_budgets(budget_xlsx, file_mtime(budget_xlsx))
+
+
+@st.cache_data(show_spinner=False)
+def _read_monthly_budgets(budget_xlsx: str, mtime: float | None) -> tuple[list, np.ndarray, dict] | None:
+    """Get the Monthly sheet's month columns, its budget rows as an array and each category's
+    first row in it (mtime is only part of the cache key)."""
+    monthly = _read_sheet(budget_xlsx, "Monthly", mtime)
     if monthly is None or monthly.empty or "Categories" not in monthly.columns:
+        return None
+    # Columns excluding 'Categories' and 'Yearly'
+    months = [c for c in monthly.columns if c not in ["Categories", "Yearly"]]
+    category_rows = {}
+    for i, category in enumerate(monthly["Categories"].tolist()):
+        category_rows.setdefault(category, i)
+    return months, monthly[months].to_numpy(), category_rows
+
+
+def show_budget_vs_actual_chart(budget_xlsx: str, transactions_xlsx: str, category: str):
+    monthly_budgets = read_monthly_budgets(budget_xlsx)
+    if monthly_budgets is None:
         st.info("Monthly sheet not available for budget vs actual chart.")
         return
-    row = monthly[monthly["Categories"] == category]
-    if row.empty:
+    months, budget_matrix, category_rows = monthly_budgets
+    if category not in category_rows:
         st.info(f"Category '{category}' not found in Monthly sheet.")
         return
-    # Columns excluding 'Categories' and 'Yearly'
-    months = [c for c in monthly.columns if c not in ["Categories", "Yearly"]]
-    budget_vals = row[months].values[0]
+    budget_vals = budget_matrix[category_rows[category]]
 
     # Load transactions
     if not file_exists(transactions_xlsx):
         st.info("Transactions file not found for actuals.")
         return
     try:
-        tdf = pd.read_excel(transactions_xlsx, sheet_name="Transactions")
+        tdf = read_transactions_sheet(transactions_xlsx)
     except Exception:
         st.info("Unable to read Transactions sheet for actuals.")
         return
     if "Date" not in tdf.columns or "Amount" not in tdf.columns or "Category" not in tdf.columns:
         st.info("Transactions sheet missing required columns.")
         return
-    tdf = tdf.copy()
-    tdf["Date"] = pd.to_datetime(tdf["Date"], errors="coerce")
-    tdf["Month"] = tdf["Date"].dt.strftime("%B %Y")
-    actuals = []
-    # Build actuals aligned to months
-    for m in months:
-        mdf = tdf[(tdf["Category"] == category) & (tdf["Month"] == m)]
-        total = mdf["Amount"].sum()
-        # If budget is negative (expense), compare magnitudes as positive
-        idx = months.index(m)
-        b = budget_vals[idx]
-        if pd.notna(b) and b < 0:
-            actuals.append(abs(total))
-        else:
-            actuals.append(total)
+    # Build actuals aligned to months in one grouped pass over the category's transactions, matching
+    # monthly periods rather than formatting a month string per transaction
+    cdf = tdf.loc[tdf["Category"] == category, ["Date", "Amount"]]
+    periods = pd.to_datetime(cdf["Date"], errors="coerce").dt.to_period("M")
+    month_periods = pd.PeriodIndex(pd.to_datetime(pd.Series(months), format="%B %Y", errors="coerce"), freq="M")
+    totals = cdf["Amount"].groupby(periods).sum().reindex(month_periods, fill_value=0.0)
+    # If budget is negative (expense), compare magnitudes as positive
+    budget_arr = np.asarray(budget_vals, dtype=float)
+    expense = np.nan_to_num(budget_arr) < 0
+    actuals = np.where(expense, totals.abs().to_numpy(), totals.to_numpy())
 
     # Plot
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = new_chart_figure()
     x = range(len(months))
     width = 0.4
     # Convert negative budgets to positive for display of expenses
-    plot_budget = [abs(v) if pd.notna(v) and v < 0 else (0 if pd.isna(v) else v) for v in budget_vals]
+    plot_budget = np.abs(np.nan_to_num(budget_arr))
     ax.bar([i - width/2 for i in x], plot_budget, width, label="Budgeted", color=LCARS_COLORS['gold'], alpha=0.8)
     ax.bar([i + width/2 for i in x], actuals, width, label="Actual", color=LCARS_COLORS['teal'], alpha=0.8)
     ax.set_title(f"Monthly Budget vs Actual: {category}", color=LCARS_COLORS['text'])
@@ -593,9 +680,9 @@ def main():
         st.subheader("File")
         st.write(budget_to_view)
         try:
-            xls = pd.ExcelFile(budget_to_view)
+            sheet_names = list_sheets(budget_to_view)
             st.subheader("Sheets")
-            st.write(xls.sheet_names)
+            st.write(sheet_names)
         except Exception as e:
             st.error(f"Unable to read budget file: {e}")
 
@@ -608,7 +695,8 @@ def main():
         for col in safe.columns:
             if safe[col].dtype == 'O':
                 # If the column mixes numbers/strings/None, convert to string uniformly
-                if not (safe[col].map(type).nunique() == 1 and safe[col].map(type).iloc[0] in (str, bytes)):
+                # (infer_dtype checks every value's type in one pass in C)
+                if pd.api.types.infer_dtype(safe[col], skipna=False) not in ('string', 'bytes'):
                     safe[col] = safe[col].astype(str)
         return safe
 
@@ -658,7 +746,7 @@ def main():
                         if len(qdf) > 20:
                             top_cats = qdf.sort_values('Planned', ascending=False).head(20)['Category']
                             melt_df = melt_df[melt_df['Category'].isin(top_cats)]
-                        fig, ax = plt.subplots(figsize=(10, 6))
+                        fig, ax = new_chart_figure()
                         sns.barplot(data=melt_df, x='Amount', y='Category', hue='Type', palette=['#1f77b4', '#d62728'], ax=ax)
                         ax.set_title(f"Q{q} Planned vs Spent by Category")
                         ax.set_xlabel("Amount ($)")
@@ -3,6 +3,8 @@ import pandas as pd
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+from utilities import EXCEL_READ_ENGINE
 
 
 def apply_accounting_format(worksheet):
@@ -15,45 +17,50 @@ def apply_accounting_format(worksheet):
 
 def autosize_columns_from_dataframe(df, worksheet):
     """Auto-size columns in an openpyxl worksheet based on dataframe contents."""
-    for idx, col in enumerate(dataframe_to_rows(df, index=True, header=True), 1):
-        for jdx, cell in enumerate(col, 1):
-            width = max(worksheet.column_dimensions[worksheet.cell(row=idx, column=jdx).column_letter].width or 0,
-                        len(str(cell)))
-            worksheet.column_dimensions[worksheet.cell(row=idx, column=jdx).column_letter].width = width
+    # Measure each column once from the dataframe instead of looking up worksheet cells row by row
+    widths = [max([len(str(df.index.name or ''))] + [len(str(x)) for x in df.index])]
+    for col in df.columns:
+        widths.append(max([len(str(col))] + [len(str(x)) for x in df[col].tolist()]))
+    for c_idx, width in enumerate(widths, 1):
+        dimension = worksheet.column_dimensions[get_column_letter(c_idx)]
+        dimension.width = max(dimension.width or 0, width)
 
 
 def format_worksheet(worksheet):
     """Apply formatting to the worksheet."""
-    # Center-align all cells
+    # Center-align all cells (sharing one Alignment rather than building one per cell)
+    centered = Alignment(horizontal="center")
     for row in worksheet.iter_rows():
         for cell in row:
-            cell.alignment = Alignment(horizontal="center")
+            cell.alignment = centered
     
     # Bold the header (month) row and the "Categories" column
+    bold = Font(bold=True)
     for cell in worksheet["A"] + worksheet[1]:
-        cell.font = Font(bold=True)
+        cell.font = bold
 
 
 def dataframe_to_excel_sheet(df, workbook, sheet_name):
     """Write a dataframe to an Excel sheet and return the worksheet."""
     ws = workbook.create_sheet(title=sheet_name)
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=True, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            ws.cell(row=r_idx, column=c_idx, value=value)
+    for row in dataframe_to_rows(df, index=True, header=True):
+        ws.append(row)
     return ws
 
 
 def enhanced_compute_differences(file1, file2, sheet_name="Monthly"):
     # Read the sheets with the specified sheet_name as the index
-    monthly1 = pd.read_excel(file1, sheet_name=sheet_name, index_col='Categories')
-    monthly2 = pd.read_excel(file2, sheet_name=sheet_name, index_col='Categories')
+    monthly1 = pd.read_excel(file1, sheet_name=sheet_name, index_col='Categories', engine=EXCEL_READ_ENGINE)
+    monthly2 = pd.read_excel(file2, sheet_name=sheet_name, index_col='Categories', engine=EXCEL_READ_ENGINE)
 
     # Outer join the two sheets for the differences
     combined = monthly1.join(monthly2, how='outer', lsuffix='_File1', rsuffix='_File2').fillna(0)
-    for month in monthly1.columns:
-        if month != "Yearly":  # We'll handle the "Yearly" column separately
-            combined[f'Diff_{month}'] = combined[f'{month}_File1'] - combined[f'{month}_File2']
-    combined['Diff_Yearly'] = combined['Yearly_File1'] - combined['Yearly_File2']
+    # Subtract every month at once, with the "Yearly" difference last
+    months = [month for month in monthly1.columns if month != "Yearly"] + ["Yearly"]
+    diff_columns = [f'Diff_{month}' for month in months]
+    values1 = combined[[f'{month}_File1' for month in months]].set_axis(diff_columns, axis=1)
+    values2 = combined[[f'{month}_File2' for month in months]].set_axis(diff_columns, axis=1)
+    combined = pd.concat([combined, values1 - values2], axis=1)
 
     # Create a new workbook
     wb = Workbook()
@@ -1,20 +1,34 @@
-from get_sums import get_monthly_sums
+from get_sums import get_monthly_sums, get_category_monthly_sums, transaction_arrays
 from budget_functions import parse_loan_budget, parse_quarterly_budget, parse_monthly_budget, parse_default_budget
 from dateutil.relativedelta import relativedelta
+from functools import lru_cache
 
 
-def parse_budget(category, category_budget, transactions, expenses, category_types, this_year):
+@lru_cache(maxsize=4096)
+def clean_description(desc, category):
+    """Rename a # description to its first word plus the category, and drop repeated words"""
+    words = [desc.split()[0], *category.split()] if '#' in desc else desc.split()
+    return ' '.join(dict.fromkeys(words))
+
+
+def parse_budget(category, category_budget, transactions, expenses, category_types, this_year,
+                 transaction_columns=None, all_monthly_sums=None):
 
     # Rename all # descriptions
     if 'Desc.' in category_budget.keys():
-        category_budget['Desc.'] = [x.split()[0] + f' {category}' if '#' in x else x
-                                    for x in category_budget['Desc.']]
-        category_budget['Desc.'] = [' '.join(list(dict.fromkeys(x.split()))) for x in category_budget['Desc.']]
+        category_budget['Desc.'] = [clean_description(x, category) for x in category_budget['Desc.']]
 
     # Determine category monthly totals for all transactions
+    # (transaction_columns are the transaction_arrays of the transactions and all_monthly_sums their
+    # get_all_monthly_sums table, when the caller already built them)
     if transactions:
-        actual_monthly_sums = get_monthly_sums(category, transactions['Date'],
-                                               transactions['Amount'], transactions['Category'])
+        if transaction_columns is None:
+            transaction_columns = transaction_arrays(transactions['Date'], transactions['Amount'],
+                                                     transactions['Category'])
+        if all_monthly_sums is None:
+            actual_monthly_sums = get_monthly_sums(category, *transaction_columns)
+        else:
+            actual_monthly_sums = get_category_monthly_sums(all_monthly_sums, category)
     else:
         actual_monthly_sums = []
 
@@ -25,7 +39,7 @@ def parse_budget(category, category_budget, transactions, expenses, category_typ
 
     elif category in category_types['Quarterly']:
         category_budget, year_projection, multi_year_projection = \
-            parse_quarterly_budget(category, category_budget, transactions, this_year)
+            parse_quarterly_budget(category, category_budget, transactions, this_year, transaction_columns)
 
     elif category in category_types['Monthly']:
         category_budget, year_projection, multi_year_projection = \
@@ -35,13 +49,10 @@ def parse_budget(category, category_budget, transactions, expenses, category_typ
         category_budget, year_projection, multi_year_projection = \
             parse_default_budget(category, category_budget, actual_monthly_sums, expenses, category_types, this_year)
 
-    # Extend the multi-year projection out to 5 years
-    forecast = []
-    for i in range(0, 5):
-        forecast.append(
-            [[x[0] + relativedelta(years=i + 1),
-              f'Forecast: {category} for {x[0].strftime("%B")} {x[0].year + i + 1}',
-              x[1], category, 0.0, ''] for x in multi_year_projection if abs(x[1]) > 0.0]
-        )
+    # Extend the multi-year projection out to 5 years (the planned months are filtered and named once)
+    planned = [(x[0], x[0].strftime("%B"), x[1]) for x in multi_year_projection if abs(x[1]) > 0.0]
+    forecast = [[[day + relativedelta(years=i), f'Forecast: {category} for {month} {day.year + i}',
+                  amount, category, 0.0, ''] for day, month, amount in planned]
+                for i in range(1, 6)]
 
     return category_budget, year_projection, forecast
@@ -0,0 +1,78 @@
+import datetime
+
+import pandas as pd
+
+import excel_management
+from excel_management import finalize_monthly_dict, write_dataframe_sheet, write_transactions_xlsx
+
+
+def test_finalize_monthly_dict_builds_month_columns_and_totals():
+    d = datetime.date
+    monthly_sums_dict = {
+        "A": [(d(2024, 1, 31), 10.0), (d(2024, 2, 29), 5.0), (d(2023, 1, 31), 99.0)],
+        "B": [(d(2024, 3, 31), -2.5)],
+        "C": [],
+    }
+
+    out = finalize_monthly_dict(["B", "Missing", "A", "C"], monthly_sums_dict)
+
+    # Only categories with monthly sums are kept, in the organized order, plus the total row
+    assert out["Categories"] == ["B", "A", "C", "Monthly Total"]
+    headers = [k for k in out.keys() if k not in ("Categories", "Yearly")]
+    assert len(headers) == 12
+    assert headers[0].startswith("January")
+    # The first sum found for a month wins
+    assert out[headers[0]] == [0.0, 10.0, 0.0, 10.0]
+    assert out[headers[2]] == [-2.5, 0.0, 0.0, -2.5]
+    assert out["Yearly"] == [-2.5, 15.0, 0.0, 12.5]
+
+
+def test_finalize_monthly_dict_without_sums_has_zero_total_row():
+    out = finalize_monthly_dict(["Missing"], {})
+    assert out["Categories"] == ["Monthly Total"]
+    assert all(v == [0.0] for k, v in out.items() if k != "Categories")
+
+
+def test_write_transactions_xlsx_backs_up_each_rewrite_under_its_own_name(tmp_path, monkeypatch):
+    archive_dir = tmp_path / "archive"
+    archive_dir.mkdir()
+    transactions_path = tmp_path / "transactions.xlsx"
+    monkeypatch.setattr(excel_management, "get_archive_dir", lambda: archive_dir)
+    monkeypatch.setattr(excel_management, "get_transactions_path", lambda: transactions_path)
+
+    def transactions():
+        return {"Date": [datetime.date(2024, 1, 2)], "Desc.": ["Coffee"], "Amount": [-3.5], "Category": ["Food"]}
+
+    # Nothing to back up before the first write
+    write_transactions_xlsx(transactions(), transactions())
+    assert list(archive_dir.iterdir()) == []
+
+    # Runs in quick succession each keep their own backup of the file they replace
+    write_transactions_xlsx(transactions(), transactions())
+    write_transactions_xlsx(transactions(), transactions())
+    assert len(list(archive_dir.iterdir())) == 2
+
+
+def test_write_dataframe_sheet_streams_rows_in_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_management, "ROW_BLOCK_SIZE", 2)
+    df = pd.DataFrame({"Desc.": ["a", "b", None, "d", "e"], "Amount": [1.0, float("nan"), 3.0, 4.0, 5.0]})
+    path = tmp_path / "out.xlsx"
+
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        write_dataframe_sheet(writer, df, "Sheet")
+
+    pd.testing.assert_frame_equal(pd.read_excel(path, sheet_name="Sheet"), df)
+
+
+def test_write_transactions_xlsx_writes_dates_chronologically(tmp_path, monkeypatch):
+    transactions_path = tmp_path / "transactions.xlsx"
+    monkeypatch.setattr(excel_management, "get_archive_dir", lambda: tmp_path)
+    monkeypatch.setattr(excel_management, "get_transactions_path", lambda: transactions_path)
+    transactions = {"Date": [datetime.date(2024, 1, 15), datetime.date(2023, 12, 1)], "Amount": [-1.0, -2.0]}
+
+    write_transactions_xlsx(transactions, {"Date": [], "Amount": []})
+
+    df = pd.read_excel(transactions_path, sheet_name="Transactions")
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+    assert df["Date"].tolist() == [pd.Timestamp(2023, 12, 1), pd.Timestamp(2024, 1, 15)]
+    assert df["Amount"].tolist() == [-2.0, -1.0]
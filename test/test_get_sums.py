@@ -0,0 +1,97 @@
+import datetime
+
+import get_sums
+from get_sums import get_all_monthly_sums, get_category_monthly_sums, get_monthly_sums, get_quarterly_sums
+
+
+def test_get_monthly_sums_buckets_amounts_by_month_for_category():
+    dates = [
+        datetime.date(2024, 1, 5),
+        datetime.date(2024, 3, 20),
+        datetime.date(2024, 1, 25),
+        datetime.date(2023, 12, 31),
+    ]
+    amounts = [10.0, 5, "", 7.5]
+    categories = ["Food", "Food", "Food", "Gas"]
+
+    out = get_monthly_sums("Food", dates, amounts, categories)
+
+    # The month grid spans all transactions; blanks count as zero and other categories are skipped
+    assert out == [
+        (datetime.date(2023, 12, 31), 0.0),
+        (datetime.date(2024, 1, 31), 10.0),
+        (datetime.date(2024, 2, 29), 0.0),
+        (datetime.date(2024, 3, 31), 5.0),
+    ]
+
+
+def test_get_monthly_sums_without_category_and_empty_input():
+    dates = [datetime.date(2024, 2, 1), datetime.date(2024, 2, 28)]
+    assert get_monthly_sums(None, dates, [1.0, 2.0], None) == [(datetime.date(2024, 2, 29), 3.0)]
+    assert get_monthly_sums(None, [], [], None) == []
+
+
+def test_get_monthly_sums_category_without_transactions_is_all_float_zeros():
+    dates = [datetime.date(2024, 1, 5), datetime.date(2024, 2, 5)]
+    out = get_monthly_sums("Travel", dates, [1.0, 2.0], ["Food", "Food"])
+    assert [x[1] for x in out] == [0.0, 0.0]
+    assert all(isinstance(x[1], float) for x in out)
+
+
+def test_get_quarterly_sums_spent_and_remaining_by_quarter(monkeypatch):
+    class FixedDatetime(datetime.datetime):
+        @classmethod
+        def today(cls):
+            return cls(2024, 5, 15)
+
+    monkeypatch.setattr(get_sums, "datetime", FixedDatetime)
+    dates = [datetime.date(2024, 2, 1), datetime.date(2024, 5, 1), datetime.date(2024, 6, 1), datetime.date(2024, 8, 1)]
+    amounts = [-40.0, -30.0, -30.0, -5.0]
+    categories = ["Clothes", "Clothes", "Clothes", "Gas"]
+    expense = [-100.0, -100.0, -100.0, -100.0]
+
+    spent, remaining = get_quarterly_sums("Clothes", dates, amounts, categories, expense)
+
+    assert spent == [(0, -40.0), (1, -60.0), (2, 0.0), (3, 0.0)]
+    # Q1 is past, Q2 (current) has what is left of its expense, Q3 and Q4 still have the full expense
+    assert remaining == [(0, 0.0), (1, -40.0), (2, -100.0), (3, -100.0)]
+
+
+def test_sum_functions_accept_transaction_arrays():
+    dates = [datetime.date(2024, 1, 5), datetime.date(2024, 2, 5), datetime.date(2024, 4, 5)]
+    amounts = [1.0, "", 4.0]
+    categories = ["Food", "Food", "Gas"]
+    arrays = get_sums.transaction_arrays(dates, amounts, categories)
+
+    assert get_monthly_sums("Food", *arrays) == get_monthly_sums("Food", dates, amounts, categories)
+    spent, _ = get_quarterly_sums("Gas", *arrays, [0.0] * 4)
+    assert spent == [(0, 0.0), (1, 4.0), (2, 0.0), (3, 0.0)]
+
+
+def test_get_quarterly_sums_skips_unparseable_array_dates():
+    arrays = get_sums.transaction_arrays([datetime.date(2024, 1, 5), None], [1.0, 100.0], ["Food", "Food"])
+
+    spent, _ = get_quarterly_sums("Food", *arrays, [0.0] * 4)
+
+    assert spent == [(0, 1.0), (1, 0.0), (2, 0.0), (3, 0.0)]
+
+
+def test_sum_functions_absent_category_does_not_match_missing_categories():
+    dates = [datetime.date(2024, 1, 5), datetime.date(2024, 1, 6)]
+    arrays = get_sums.transaction_arrays(dates, [5.0, 7.0], ["Food", None])
+
+    assert get_monthly_sums("Travel", *arrays) == [(datetime.date(2024, 1, 31), 0.0)]
+    spent, _ = get_quarterly_sums("Travel", *arrays, [0.0] * 4)
+    assert spent == [(0, 0.0), (1, 0.0), (2, 0.0), (3, 0.0)]
+
+
+def test_get_all_monthly_sums_matches_per_category_sums():
+    dates = [datetime.date(2024, 1, 5), datetime.date(2024, 3, 20), datetime.date(2024, 1, 25), "bad"]
+    amounts = [10.0, 5, "", 7.5]
+    categories = ["Food", "Gas", "Food", "Gas"]
+
+    all_sums = get_all_monthly_sums(dates, amounts, categories)
+
+    assert list(all_sums.columns) == ["Food", "Gas"]
+    for category in ["Food", "Gas", "Missing"]:
+        assert get_category_monthly_sums(all_sums, category) == get_monthly_sums(category, dates, amounts, categories)
@@ -58,6 +58,13 @@ def test_dates_to_str_formats_date_columns():
     assert d["Date"] == ["01/02/2024", ""]
 
 
+def test_dates_to_str_is_a_no_op_on_converted_dates():
+    d = {"Date": [datetime.date(2024, 1, 2), ""]}
+    dates_to_str(d)
+    dates_to_str(d)
+    assert d["Date"] == ["01/02/2024", ""]
+
+
 def test_remove_list_blanks_nonzero_filters_empty_strings():
     assert remove_list_blanks_nonzero(["", "a", "", "b"]) == ["a", "b"]
 
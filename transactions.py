@@ -1,9 +1,10 @@
 import os.path
-from datetime import datetime
+from datetime import datetime, date
 import pandas as pd
 from utilities import cat_lists, similar
 from excel_management import write_transactions_xlsx
-import glob
+import fnmatch
+from collections import defaultdict
 from itertools import combinations
 import re
 from config import get_downloads_dir, get_auto_categories_path, get_transactions_path
@@ -11,16 +12,23 @@ from config import get_downloads_dir, get_auto_categories_path, get_transactions
 
 def get_new_transactions():
 
-    # Use configured downloads directory from config.py
+    # Use configured downloads directory from config.py, listed once for all bank file patterns
     downloads_dir = str(get_downloads_dir()) + '/'
-    
     try:
-        wf_file = glob.glob(f'{downloads_dir}CreditCard*.csv')[0]
+        downloads = os.listdir(downloads_dir)
+    except FileNotFoundError:
+        downloads = []
+
+    def find_downloads(pattern):
+        return [downloads_dir + x for x in fnmatch.filter(downloads, pattern)]
+
+    try:
+        wf_file = find_downloads('CreditCard*.csv')[0]
     except IndexError:
         wf_file = ''
     
     try:
-        chase_files = sorted(glob.glob(f'{downloads_dir}Chase3376_Activity_*.CSV'))
+        chase_files = sorted(find_downloads('Chase3376_Activity_*.CSV'))
         if chase_files:
             chase_file = chase_files[-1]
         else:
@@ -29,16 +37,16 @@ def get_new_transactions():
         chase_file = ''
     
     try:
-        rr_file = glob.glob(f'{downloads_dir}Chase9*_Activity_*.csv')[0]
+        rr_file = find_downloads('Chase9*_Activity_*.csv')[0]
     except IndexError:
         rr_file = ''
     
     try:
-        ally_file = glob.glob(f'{downloads_dir}transactions*.csv')[0]
+        ally_file = find_downloads('transactions*.csv')[0]
     except IndexError:
         ally_file = ''
 
-    # Get the transactions
+    # Get the transactions (each line is split once and its fields picked from the parts)
     # WF Active
     wf_dates =[]
     wf_desc = []
@@ -46,10 +54,10 @@ def get_new_transactions():
     wf_account = []
     try:
         with open(wf_file) as f:
-            lines = f.read().splitlines()
-        wf_dates = [datetime.strptime(x.split(',')[0].replace('"', ''), '%m/%d/%Y').date() for x in lines]
-        wf_amounts = [float(x.split(',')[1].replace('"', '')) for x in lines]
-        wf_desc = [x.split(',')[4].replace('"', '') for x in lines]
+            rows = [x.split(',') for x in f.read().splitlines()]
+        wf_dates = [datetime.strptime(x[0].replace('"', ''), '%m/%d/%Y').date() for x in rows]
+        wf_amounts = [float(x[1].replace('"', '')) for x in rows]
+        wf_desc = [x[4].replace('"', '') for x in rows]
         wf_account = ['wf active']*len(wf_desc)
     except FileNotFoundError:
         print('No wf active transactions found')
@@ -61,10 +69,10 @@ def get_new_transactions():
     a_account = []
     try:
         with open(ally_file) as f:
-            lines = f.read().splitlines()
-        a_dates = [datetime.strptime(x.split(',')[0], '%Y-%m-%d').date() for x in lines[1:]]
-        a_amounts = [float(x.split(',')[2]) for x in lines[1:]]
-        a_desc = [x.split(',')[4] for x in lines[1:]]
+            rows = [x.split(',') for x in f.read().splitlines()[1:]]
+        a_dates = [date.fromisoformat(x[0]) for x in rows]
+        a_amounts = [float(x[2]) for x in rows]
+        a_desc = [x[4] for x in rows]
         a_account = ['ally']*len(a_desc)
     except FileNotFoundError:
         print('No ally transactions found')
@@ -76,10 +84,10 @@ def get_new_transactions():
     rr_account = []
     try:
         with open(rr_file) as f:
-            lines = f.read().splitlines()
-        rr_dates = [datetime.strptime(x.split(',')[0], '%m/%d/%Y').date() for x in lines[1:]]
-        rr_desc = [x.split(',')[2] for x in lines[1:]]
-        rr_amounts = [float(x.split(',')[5]) for x in lines[1:]]
+            rows = [x.split(',') for x in f.read().splitlines()[1:]]
+        rr_dates = [datetime.strptime(x[0], '%m/%d/%Y').date() for x in rows]
+        rr_desc = [x[2] for x in rows]
+        rr_amounts = [float(x[5]) for x in rows]
         rr_account = ['chase_rr']*len(rr_amounts)
     except FileNotFoundError:
         print('No Chase RR transactions found')
@@ -91,10 +99,10 @@ def get_new_transactions():
     cc_account = []
     try:
         with open(chase_file) as f:
-            lines = f.read().splitlines()
-        cc_dates = [datetime.strptime(x.split(',')[1], '%m/%d/%Y').date() for x in lines[1:]]
-        cc_desc = [x.split(',')[2] for x in lines[1:]]
-        cc_amounts = [float(x.split(',')[3]) for x in lines[1:]]
+            rows = [x.split(',') for x in f.read().splitlines()[1:]]
+        cc_dates = [datetime.strptime(x[1], '%m/%d/%Y').date() for x in rows]
+        cc_desc = [x[2] for x in rows]
+        cc_amounts = [float(x[3]) for x in rows]
         cc_account = ['chase_checking']*len(cc_amounts)
     except FileNotFoundError:
         print('No chase checking transactions found')
@@ -190,9 +198,14 @@ def update_old_transactions(new_transactions, old_transactions):
     new_transactions_descriptions = new_transactions['Description']
     new_transactions['Description'] = [x.replace('"', '') for x in new_transactions_descriptions]
     
+    # Index the old transactions by date once instead of scanning them for every new transaction
+    old_indices_by_date = defaultdict(list)
+    for i, x in enumerate(old_transactions['Date']):
+        old_indices_by_date[x].append(i)
+
     for d, date_value in enumerate(new_transactions['Date']):
         # Find all old transactions on the same date
-        i_same_date = [i for i, x in enumerate(old_transactions['Date']) if x == date_value]
+        i_same_date = old_indices_by_date.get(date_value, [])
         
         if i_same_date:
             # print(f"Debug: Checking new transaction: {new_transactions['Description'][d]} = ${new_transactions['Amount'][d]} on {date_value}")
@@ -342,35 +355,11 @@ def get_old_transactions(transactions_xlsx):
     df.fillna('', inplace=True)
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
     df.sort_values('Date', inplace=True)
+
+    # Convert the parsed dates to datetime.date in one pass, with unparseable dates as None
+    dates = df['Date'].dt.date.astype(object)
+    df['Date'] = dates.where(df['Date'].notna(), None)
     old_transactions = df.to_dict('list')
-    
-    # Handle potential mixed types in the Date column
-    converted_dates = []
-    for x in old_transactions['Date']:
-        if pd.isna(x):
-            # Handle NaN values
-            converted_dates.append(None)
-        elif isinstance(x, (int, float)):
-            # Handle numeric values by converting them to datetime
-            try:
-                dt = pd.to_datetime(x)
-                converted_dates.append(dt.date())
-            except:
-                # If conversion fails, use None
-                converted_dates.append(None)
-        else:
-            # Handle datetime objects
-            try:
-                converted_dates.append(x.to_pydatetime().date())
-            except AttributeError:
-                # Fallback for any other types
-                try:
-                    dt = pd.to_datetime(x)
-                    converted_dates.append(dt.date())
-                except:
-                    converted_dates.append(None)
-    
-    old_transactions['Date'] = converted_dates
 
     return f, old_transactions
 
@@ -405,10 +394,8 @@ def clean_split_transactions(transactions):
     transactions_to_remove = []
     
     # Group transactions by date
-    date_groups = {}
+    date_groups = defaultdict(list)
     for i, date in enumerate(transactions['Date']):
-        if date not in date_groups:
-            date_groups[date] = []
         date_groups[date].append(i)
     
     # Check each date group for split transaction scenarios
@@ -478,12 +465,10 @@ def clean_split_transactions(transactions):
         print(f"\nRemoving {len(transactions_to_remove)} uncategorized transactions that have been split:")
         
         # Create new transaction lists without the removed transactions
+        removed = set(transactions_to_remove)
         cleaned_transactions = {}
         for key in transactions.keys():
-            cleaned_transactions[key] = []
-            for i, value in enumerate(transactions[key]):
-                if i not in transactions_to_remove:
-                    cleaned_transactions[key].append(value)
+            cleaned_transactions[key] = [value for i, value in enumerate(transactions[key]) if i not in removed]
         
         # Show what was removed
         for idx in sorted(transactions_to_remove):
@@ -527,7 +512,11 @@ def update_auto_categories(transactions_xlsx=None, auto_categories_xlsx=None):
     # If there are new pairs, append them
     if not df_new.empty:
         df_updated = pd.concat([df_auto, df_new], ignore_index=True)
-        df_updated.to_excel(auto_categories_xlsx, index=False)
+        # Write to a temporary file and swap it in so an interrupted write cannot corrupt the rules
+        root, ext = os.path.splitext(auto_categories_xlsx)
+        tmp_xlsx = f'{root}.tmp{ext}'
+        df_updated.to_excel(tmp_xlsx, index=False)
+        os.replace(tmp_xlsx, auto_categories_xlsx)
         print(f'Added {len(df_new)} new unique pairs to {auto_categories_xlsx}')
     else:
         print('No new unique pairs to add')
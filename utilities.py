@@ -1,5 +1,9 @@
 from datetime import timedelta, date, datetime
 from difflib import SequenceMatcher
+from importlib.util import find_spec
+
+# Read workbooks with the Rust calamine parser when python-calamine is installed, falling back to openpyxl
+EXCEL_READ_ENGINE = 'calamine' if find_spec('python_calamine') else 'openpyxl'
 
 
 def remove_list_blanks_nonzero(my_list):
@@ -54,6 +58,9 @@ def dates_to_str(my_dict):
                 continue
             if isinstance(dates[0], int):
                 continue
+            # Already converted (e.g. a second call on the same dict)
+            if all(isinstance(x, str) for x in dates):
+                continue
             my_dict[key] = ['' if x == '' else x.strftime('%m/%d/%Y') for x in dates]
 
 
@@ -4,7 +4,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, date, timedelta
 import os
+from functools import lru_cache
 from config import get_transactions_path, get_budget_path, OUTPUTS_DIR
+from utilities import EXCEL_READ_ENGINE
 
 
 def get_plots_dir():
@@ -33,20 +35,37 @@ def load_transaction_data(file_path=None):
     """Load and prepare transaction data"""
     if file_path is None:
         file_path = str(get_transactions_path())
-    df = pd.read_excel(file_path)
+    # Reuse the parsed workbook while the file is unchanged; copy so callers can modify their frame
+    return _read_transaction_data(file_path, os.path.getmtime(file_path)).copy()
+
+@lru_cache(maxsize=8)
+def _read_transaction_data(file_path, mtime):
+    """Parse the transactions workbook (mtime is only part of the cache key)"""
+    df = pd.read_excel(file_path, engine=EXCEL_READ_ENGINE)
     # Ensure Date is datetime
     if not pd.api.types.is_datetime64_any_dtype(df['Date']):
         df['Date'] = pd.to_datetime(df['Date'])
+    # Store categories as integer codes so filters and groupbys compare ints instead of strings
+    if 'Category' in df.columns:
+        df['Category'] = df['Category'].astype('category')
     return df
 
 def load_budget_data(file_path=None):
     """Load budget data from various sheets"""
     if file_path is None:
         file_path = str(get_budget_path())
-    # Load different sheets
-    monthly_budget = pd.read_excel(file_path, sheet_name='Monthly')
-    projection = pd.read_excel(file_path, sheet_name='Projection')
-    balances = pd.read_excel(file_path, sheet_name='Balances')
+    # Reuse the parsed workbook while the file is unchanged; copy so callers can modify their frames
+    budget_data = _read_budget_data(file_path, os.path.getmtime(file_path))
+    return {key: df.copy() for key, df in budget_data.items()}
+
+@lru_cache(maxsize=8)
+def _read_budget_data(file_path, mtime):
+    """Parse the budget workbook sheets (mtime is only part of the cache key)"""
+    # Load different sheets from one open workbook
+    with pd.ExcelFile(file_path, engine=EXCEL_READ_ENGINE) as xls:
+        monthly_budget = xls.parse(sheet_name='Monthly')
+        projection = xls.parse(sheet_name='Projection')
+        balances = xls.parse(sheet_name='Balances')
     
     # Prepare projection data
     if 'Date' in projection.columns and not pd.api.types.is_datetime64_any_dtype(projection['Date']):
@@ -61,7 +80,7 @@ def load_budget_data(file_path=None):
 def plot_monthly_spending_by_category(df, top_n=10, save=True):
     """Plot monthly spending by top N categories"""
     # Group by category and sum the amounts (negative values are expenses)
-    category_spending = df[df['Amount'] < 0].groupby('Category')['Amount'].sum().abs()
+    category_spending = df[df['Amount'] < 0].groupby('Category', observed=True)['Amount'].sum().abs()
     
     # Get the top N categories by spending
     top_categories = category_spending.nlargest(top_n)
@@ -94,13 +113,13 @@ def plot_spending_trend_over_time(df, top_categories=None, save=True):
     
     # If no categories specified, use top 5 by total spending
     if top_categories is None:
-        top_categories = df[df['Amount'] < 0].groupby('Category')['Amount'].sum().abs().nlargest(5).index.tolist()
+        top_categories = df[df['Amount'] < 0].groupby('Category', observed=True)['Amount'].sum().abs().nlargest(5).index.tolist()
     
     # Filter data to include only expenses in the specified categories
     filtered_df = df[(df['Amount'] < 0) & (df['Category'].isin(top_categories))]
     
     # Group by date and category, then sum amounts
-    daily_spending = filtered_df.groupby(['Date', 'Category'])['Amount'].sum().abs().reset_index()
+    daily_spending = filtered_df.groupby(['Date', 'Category'], observed=True)['Amount'].sum().abs().reset_index()
     
     # Create the plot
     plt.figure(figsize=(14, 8))
@@ -357,7 +376,7 @@ def generate_all_plots():
     plot_monthly_spending_by_category(transactions_df)
     
     # Plot spending trends for top 5 categories
-    top_spending_categories = transactions_df[transactions_df['Amount'] < 0].groupby('Category')['Amount'].sum().abs().nlargest(5).index.tolist()
+    top_spending_categories = transactions_df[transactions_df['Amount'] < 0].groupby('Category', observed=True)['Amount'].sum().abs().nlargest(5).index.tolist()
     plot_spending_trend_over_time(transactions_df, top_categories=top_spending_categories)
     
     # Plot income vs expenses